@@ -91,8 +91,8 @@ class InlineCheckboxes(Field):
     def render(self, form, form_style, context):
         context.update({'inline_class': 'inline'})
         html = super(InlineCheckboxes, self).render(form, form_style, context)
-        # We delete the inserted key to avoid side effects
-        del context.dicts[-2]['inline_class']
+        # We remove the inserted key to avoid side effects
+        context.pop()
         return html
 
 
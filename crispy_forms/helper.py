@@ -1,9 +1,10 @@
 from django.conf import settings
 from django.core.urlresolvers import reverse, NoReverseMatch
 from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
 
 from layout import Layout, LayoutSlice
-from utils import render_field, flatatt
+from utils import render_field, render_plan, flatatt
 from exceptions import FormHelpersException
 
 
@@ -11,6 +12,8 @@ class DynamicLayoutHandler(object):
     def _check_layout(self):
         if self.layout is None:
             raise FormHelpersException("You need to set a layout in your FormHelper")
+        # The layout is about to be changed, compiled render plans are dropped
+        self.__dict__.pop('_render_plans', None)
 
     def _check_layout_and_form(self):
         self._check_layout()
@@ -236,6 +239,25 @@ class FormHelper(DynamicLayoutHandler):
 
     def add_layout(self, layout):
         self.layout = layout
+        self.__dict__.pop('_render_plans', None)
+
+    def get_render_plan(self, form):
+        """
+        Returns the render plan of the layout for `form`, compiled once per form
+        class and layout, so rendering every form of a formset only fills in the
+        fields. Plans are dropped when the layout is changed through the helper.
+        """
+        plans = self.__dict__.setdefault('_render_plans', {})
+        key = (form.__class__, id(self.layout), self.form_style, get_language())
+        if key in plans and plans[key][0] is self.layout:
+            return plans[key][1]
+
+        if hasattr(self.layout, 'compile'):
+            plan = self.layout.compile(self.form_style)
+        else:
+            plan = [self.layout]
+        plans[key] = (self.layout, plan)
+        return plan
 
     def render_layout(self, form, context):
         """
@@ -244,7 +266,7 @@ class FormHelper(DynamicLayoutHandler):
         form.rendered_fields = set()
 
         # This renders the specifed Layout
-        html = self.layout.render(form, self.form_style, context)
+        html = render_plan(self.get_render_plan(form), form, self.form_style, context)
 
         if self.render_unmentioned_fields:
             fields = set(form.fields.keys())
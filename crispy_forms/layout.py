@@ -4,12 +4,20 @@ from django.template.loader import render_to_string
 from django.template.defaultfilters import slugify
 from django.utils.html import conditional_escape
 
-from utils import render_field, flatatt
+from utils import render_field, flatatt, compile_fields, compile_wrapper, FieldSlot
 from exceptions import DynamicError
 
 TEMPLATE_PACK = getattr(settings, 'CRISPY_TEMPLATE_PACK', 'bootstrap')
 
 
+def renders_like(layout_object, LayoutClass):
+    """
+    Returns True if `layout_object` uses the render method of `LayoutClass`,
+    subclasses with their own render can't use its compile method.
+    """
+    return type(layout_object).render.im_func is LayoutClass.render.im_func
+
+
 class LayoutObject(object):
     def __getitem__(self, slice):
         return self.fields[slice]
@@ -122,6 +130,14 @@ class Layout(LayoutObject):
             html += render_field(field, form, form_style, context)
         return html
 
+    def compile(self, form_style):
+        """
+        Returns the render plan of the layout, see `crispy_forms.utils.compile_fields`
+        """
+        if not renders_like(self, Layout):
+            return [self]
+        return compile_fields(self.fields, form_style)
+
 
 class LayoutSlice(object):
     def __init__(self, layout, key):
@@ -239,6 +255,12 @@ class ButtonHolder(LayoutObject):
 
         return render_to_string(self.template, Context({'buttonholder': self, 'fields_output': html}))
 
+    def compile(self, form_style):
+        if not renders_like(self, ButtonHolder):
+            return [self]
+        return compile_wrapper(self, form_style, lambda html: render_to_string(
+            self.template, Context({'buttonholder': self, 'fields_output': html})))
+
 
 class BaseInput(object):
     """
@@ -351,6 +373,18 @@ class Fieldset(LayoutObject):
             legend = u'%s' % Template(unicode(self.legend)).render(context)
         return render_to_string(self.template, Context({'fieldset': self, 'legend': legend, 'fields': fields, 'form_style': form_style}))
 
+    def compile(self, form_style):
+        if not renders_like(self, Fieldset):
+            return [self]
+        legend = u''
+        if self.legend:
+            legend = unicode(self.legend)
+        # A legend using template syntax is rendered with the page context
+        if '{' in legend:
+            return [self]
+        return compile_wrapper(self, form_style, lambda fields: render_to_string(
+            self.template, Context({'fieldset': self, 'legend': legend, 'fields': fields, 'form_style': form_style})))
+
 
 class MultiField(LayoutObject):
     """ multiField container. Renders to a multiField <div> """
@@ -409,6 +443,12 @@ class Div(LayoutObject):
 
         return render_to_string(self.template, Context({'div': self, 'fields': fields}))
 
+    def compile(self, form_style):
+        if not renders_like(self, Div):
+            return [self]
+        return compile_wrapper(self, form_style, lambda fields: render_to_string(
+            self.template, Context({'div': self, 'fields': fields})))
+
 
 class Row(Div):
     """
@@ -547,6 +587,11 @@ class Field(LayoutObject):
             html += render_field(field, form, form_style, context, template=self.template, attrs=self.attrs)
         return html
 
+    def compile(self, form_style):
+        if not renders_like(self, Field):
+            return [self]
+        return [FieldSlot(field, self.template, self.attrs) for field in self.fields]
+
 class MultiWidgetField(Field):
     """
     Layout object. For fields with :class:`~django.forms.MultiWidget` as `widget`, you can pass
@@ -33,6 +33,27 @@ def css_class(field):
     """
     return field.field.widget.__class__.__name__.lower()
 
+def update_widget_attrs(field, widget, html5_required=False):
+    """
+    Adds the css class of its type and the HTML5 required attribute to a widget
+    of `field`, as `{% crispy_field %}` does before rendering it.
+    """
+    class_name = widget.__class__.__name__.lower()
+    class_name = class_converter.get(class_name, class_name)
+    css_class = widget.attrs.get('class', '')
+    if css_class:
+        if css_class.find(class_name) == -1:
+            css_class += " %s" % class_name
+    else:
+        css_class = class_name
+
+    widget.attrs['class'] = css_class
+
+    # HTML5 required attribute
+    if html5_required and field.field.required and 'required' not in widget.attrs:
+        if field.field.widget.__class__.__name__ is not 'RadioSelect':
+            widget.attrs['required'] = 'required'
+
 def pairwise(iterable):
     "s -> (s0,s1), (s2,s3), (s4, s5), ..."
     a = iter(iterable)
@@ -67,21 +88,7 @@ class CrispyFieldNode(template.Node):
             attrs = [attrs] * len(widgets)
 
         for widget, attr in zip(widgets, attrs):
-            class_name = widget.__class__.__name__.lower()
-            class_name = class_converter.get(class_name, class_name)
-            css_class = widget.attrs.get('class', '')
-            if css_class:
-                if css_class.find(class_name) == -1:
-                    css_class += " %s" % class_name
-            else:
-                css_class = class_name
-
-            widget.attrs['class'] = css_class
-
-            # HTML5 required attribute
-            if html5_required and field.field.required and 'required' not in widget.attrs:
-                if field.field.widget.__class__.__name__ is not 'RadioSelect':
-                    widget.attrs['required'] = 'required'
+            update_widget_attrs(field, widget, html5_required)
 
             for attribute_name, attribute in attr.items():
                 widget.attrs[template.Variable(attribute_name).resolve(context)] = template.Variable(attribute).resolve(context)
@@ -121,8 +121,8 @@ class BasicNode(template.Node):
                 actual_form.form_html = helper.render_layout(actual_form, node_context)
             else:
                 forloop = ForLoopSimulator(actual_form)
+                node_context.update({'forloop': forloop})
                 for form in actual_form.forms:
-                    node_context.update({'forloop': forloop})
                     form.form_html = helper.render_layout(form, node_context)
                     forloop.iterate()
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Compares the time rendering an inline formset like the admin does, with
+fields rendered by templates and by the python bootstrap field renderer::
+
+    python benchmark.py [rows] [repeat]
+"""
+import os, sys, time
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'test_settings_bootstrap'
+parent = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+
+sys.path.insert(0, parent)
+
+from django import forms
+from django.conf import settings
+from django.forms.formsets import formset_factory
+from django.template import Context
+from django.template.loader import get_template_from_string
+
+from crispy_forms.helper import FormHelper
+from crispy_forms.layout import Layout, Field
+
+
+class BenchmarkForm(forms.Form):
+    name = forms.CharField(max_length=30, help_text="Full name")
+    email = forms.EmailField()
+    kind = forms.ChoiceField(choices=[(i, 'Kind %s' % i) for i in range(10)])
+    active = forms.BooleanField(required=False)
+    birthday = forms.DateField(required=False)
+    notes = forms.CharField(widget=forms.Textarea, required=False)
+    phone = forms.CharField(required=False)
+    code = forms.CharField(widget=forms.HiddenInput, required=False)
+
+
+def render_formset(rows, fast):
+    settings.CRISPY_FAST_FIELD_RENDER = fast
+    template = get_template_from_string(u"""
+        {% load crispy_forms_tags %}
+        {% crispy formset helper %}
+    """)
+    helper = FormHelper()
+    helper.form_tag = False
+    helper.add_layout(Layout(Field('name', css_class='span4'), 'email', 'kind',
+        'active', 'birthday', 'notes', 'phone', 'code'))
+
+    formset = formset_factory(BenchmarkForm, extra=rows)()
+    return template.render(Context({'formset': formset, 'helper': helper}))
+
+
+def benchmark(rows=30, repeat=10):
+    results = {}
+    for fast in (False, True):
+        render_formset(rows, fast)
+        start = time.time()
+        for i in range(repeat):
+            results[fast] = render_formset(rows, fast)
+        elapsed = (time.time() - start) / repeat
+        print "%-10s %3d rows x 8 fields: %.1f ms" % (fast and 'python' or 'templates', rows, elapsed * 1000)
+        results[fast, 'time'] = elapsed
+
+    assert results[True] == results[False], "The python renderer output differs from the templates"
+    print "speedup: %.1fx" % (results[False, 'time'] / results[True, 'time'])
+
+
+if __name__ == '__main__':
+    benchmark(*[int(arg) for arg in sys.argv[1:3]])
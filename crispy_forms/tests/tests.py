@@ -841,6 +841,59 @@ class TestFormLayout(TestCase):
         else:
             self.assertEqual(html.count('row'), 3)
 
+    def test_compiled_layout(self):
+        layout = Layout(
+            Fieldset("Company data",
+                'is_company',
+                Row('password1', 'password2'),
+                Div(Field('email', css_class='span4'), css_id='email-div'),
+            ),
+            Fieldset("{{ legend }}", 'first_name'),
+            HTML("{{ legend }} html"),
+            MultiField("Last name", 'last_name'),
+            ButtonHolder(Submit('save', 'save')),
+        )
+        form_helper = FormHelper()
+        form_helper.add_layout(layout)
+
+        form = TestForm()
+        form.rendered_fields = set()
+        html = layout.render(form, form_helper.form_style, Context({'legend': 'Dynamic'}))
+
+        self.assertEqual(form_helper.render_layout(TestForm(), Context({'legend': 'Dynamic'})), html)
+        # Second render uses the cached render plan
+        self.assertEqual(form_helper.render_layout(TestForm(), Context({'legend': 'Dynamic'})), html)
+
+    def test_compiled_layout_changed_dynamically(self):
+        form_helper = FormHelper()
+        form_helper.add_layout(Layout('email', 'first_name'))
+        html = form_helper.render_layout(TestForm(), Context())
+        self.assertFalse('wrapped-email' in html)
+
+        form_helper['email'].wrap(Div, css_class='wrapped-email')
+        html = form_helper.render_layout(TestForm(), Context())
+        self.assertTrue('wrapped-email' in html)
+
+    def test_fast_field_render(self):
+        template = get_template_from_string(u"""
+            {% load crispy_forms_tags %}
+            {% crispy form form_helper %}
+        """)
+        form_helper = FormHelper()
+        form_helper.html5_required = True
+        form_helper.help_text_inline = True
+        form_helper.add_layout(Layout(
+            'is_company', Field('email', css_class='span4'), 'password1',
+            'password2', 'first_name', 'last_name', 'datetime_field'
+        ))
+
+        for data in (None, {'email': 'invalid', 'first_name': 'too long'}):
+            html = template.render(Context({'form': TestForm(data), 'form_helper': form_helper}))
+            settings.CRISPY_FAST_FIELD_RENDER = False
+            template_html = template.render(Context({'form': TestForm(data), 'form_helper': form_helper}))
+            del settings.CRISPY_FAST_FIELD_RENDER
+            self.assertEqual(html, template_html)
+
     def test_multiwidget_field(self):
         template = get_template_from_string(u"""
             {% load crispy_forms_tags %}
@@ -1,12 +1,15 @@
 import logging
+import os
 import sys
 
 from django.conf import settings
 from django.forms.forms import BoundField
-from django.template import Context
-from django.template.loader import get_template
+from django.template import Context, TemplateDoesNotExist
+from django.template.loader import get_template, find_template_loader
+from django.utils.encoding import force_unicode
 from django.utils.html import conditional_escape
-from django.utils.functional import SimpleLazyObject
+from django.utils.functional import Promise, SimpleLazyObject
+from django.utils.translation import get_language
 
 
 # Global field template, default template used for rendering a field. This way we avoid
@@ -14,6 +17,11 @@ from django.utils.functional import SimpleLazyObject
 TEMPLATE_PACK = getattr(settings, 'CRISPY_TEMPLATE_PACK', 'bootstrap')
 default_field_template = SimpleLazyObject(lambda: get_template("%s/field.html" % TEMPLATE_PACK))
 
+try:
+    from django.template.base import render_value_in_context
+except ImportError:
+    from django.template.base import _render_value_in_context as render_value_in_context
+
 
 def render_field(field, form, form_style, context, template=None, labelclass=None, layout_object=None, attrs=None):
     """
@@ -98,11 +106,6 @@ def render_field(field, form, form_style, context, template=None, labelclass=Non
     else:
         bound_field = BoundField(form, field_instance, field)
 
-        if template is None:
-            template = default_field_template
-        else:
-            template = get_template(template)
-
         # We save the Layout object's bound fields in the layout object's `bound_fields` list
         if layout_object is not None:
             layout_object.bound_fields.append(bound_field)
@@ -112,11 +115,284 @@ def render_field(field, form, form_style, context, template=None, labelclass=Non
             'labelclass': labelclass,
             'flat_attrs': flatatt(attrs if isinstance(attrs, dict) else {}),
         })
-        html = template.render(context)
+        if renders_fast(template, field_instance.widget):
+            html = render_bootstrap_field(bound_field, context)
+        else:
+            if template is None:
+                template = default_field_template
+            else:
+                template = get_template(template)
+            html = template.render(context)
+        context.pop()
 
     return html
 
 
+# Templates rendered by `render_bootstrap_field`
+FAST_FIELD_TEMPLATES = (
+    'bootstrap/field.html',
+    'bootstrap/layout/help_text_and_errors.html',
+    'bootstrap/layout/help_text.html',
+    'bootstrap/layout/field_errors.html',
+    'bootstrap/layout/field_errors_block.html',
+)
+# Widgets whose bootstrap templates are left to render them
+TEMPLATE_RENDERED_WIDGETS = ('checkboxselectmultiple', 'radioselect')
+
+_fast_templates = None
+
+
+def template_source_name(template_name):
+    """
+    Returns the file name the template loaders load `template_name` from.
+    """
+    loaders = [find_template_loader(loader) for loader in settings.TEMPLATE_LOADERS]
+    while loaders:
+        loader = loaders.pop(0)
+        if loader is None:
+            continue
+        # cached loader
+        if hasattr(loader, 'loaders'):
+            loaders[0:0] = loader.loaders
+            continue
+        try:
+            return loader.load_template_source(template_name)[1]
+        except (TemplateDoesNotExist, NotImplementedError):
+            continue
+
+
+def fast_templates_enabled():
+    """
+    Returns True if the templates rendered by `render_bootstrap_field` are the
+    ones shipped with crispy_forms, so it can be used in their place.
+    """
+    global _fast_templates
+    if _fast_templates is None:
+        templates_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+        _fast_templates = True
+        for name in FAST_FIELD_TEMPLATES:
+            source = template_source_name(name)
+            if source is None or os.path.abspath(source) != os.path.join(templates_dir, *name.split('/')):
+                _fast_templates = False
+                break
+    return _fast_templates
+
+
+def renders_fast(template, widget):
+    """
+    Returns True if a field with `widget` rendered with `template` can be
+    rendered by `render_bootstrap_field`. Set `CRISPY_FAST_FIELD_RENDER` to
+    False to always render fields with their templates.
+    """
+    if template is None:
+        template = "%s/field.html" % TEMPLATE_PACK
+    return (template == 'bootstrap/field.html'
+        and widget.__class__.__name__.lower() not in TEMPLATE_RENDERED_WIDGETS
+        and getattr(settings, 'CRISPY_FAST_FIELD_RENDER', True)
+        and fast_templates_enabled())
+
+
+def render_bootstrap_field(field, context):
+    """
+    Renders the bound field `field` in python, producing the same html as
+    the `bootstrap/field.html` template with `context` does.
+    """
+    from crispy_forms.templatetags.crispy_forms_field import is_checkbox, update_widget_attrs
+
+    value = lambda v: render_value_in_context(v, context)
+
+    if field.is_hidden:
+        return u'\n\n\n\t%s\n\n' % value(field)
+
+    required = field.field.required
+    checkbox = is_checkbox(field)
+
+    html = [u'\n\n\n\t<div id="div_', value(field.auto_id), u'" class="clearfix control-group']
+    if context.get('form_show_errors') and field.errors:
+        html.append(u' error')
+    css_classes = field.css_classes()
+    if css_classes:
+        html.extend([u' ', value(css_classes)])
+    html.append(u'">\n\t\t')
+
+    if field.label and not checkbox:
+        html.extend([u'\n\t\t\t<label for="', value(field.id_for_label),
+            u'" class="control-label ', required and u'requiredField' or u'',
+            u'">\n\t\t\t\t', force_unicode(field.label),
+            required and u'<span class="asteriskField">*</span>' or u'',
+            u'\n\t\t\t</label>\n\t\t'])
+    html.append(u'\n    \n         \n\n        \n\n        \n            <div class="controls">\n                ')
+
+    # {% crispy_field field %}
+    html5_required = context.get('html5_required', False)
+    for widget in getattr(field.field.widget, 'widgets', [field.field.widget,]):
+        update_widget_attrs(field, widget, html5_required)
+
+    if checkbox:
+        html.extend([u'\n                    <label for="', value(field.id_for_label),
+            u'" class="checkbox ', required and u'requiredField' or u'',
+            u'">\n                        ', force_unicode(field),
+            u'\n                        ', force_unicode(field.label),
+            u'\n                        ', render_help_text_and_errors(field, context, value),
+            u'\n                    </label>\n                '])
+    else:
+        html.extend([u'\n                    ', force_unicode(field),
+            u'\n                    ', render_help_text_and_errors(field, context, value),
+            u'\n                '])
+    html.append(u'\n            </div>\n        \n\t</div>\n\n')
+    return u''.join(html)
+
+
+def render_help_text_and_errors(field, context, value):
+    """
+    `bootstrap/layout/help_text_and_errors.html` for `render_bootstrap_field`
+    """
+    help_text_inline = context.get('help_text_inline')
+    error_text_inline = context.get('error_text_inline')
+
+    def help_text():
+        if not field.help_text:
+            return u'\n'
+        if help_text_inline:
+            tag = u'\n        <span id="hint_%s" class="help-inline">%s</span>\n    '
+        else:
+            tag = u'\n        <p id="hint_%s" class="help-block">%s</p>\n    '
+        return u'\n    %s\n\n' % (tag % (value(field.auto_id), force_unicode(field.help_text)))
+
+    def errors(tag):
+        if not (context.get('form_show_errors') and field.errors):
+            return u'\n'
+        html = [u'\n    ']
+        for counter, error in enumerate(field.errors):
+            html.append(tag % (value(counter + 1), value(field.auto_id), value(error)))
+        html.append(u'\n\n')
+        return u''.join(html)
+
+    html = []
+    if help_text_inline and not error_text_inline:
+        html.extend([u'\n    ', help_text(), u'\n'])
+    html.append(u'\n\n')
+    if error_text_inline:
+        html.extend([u'\n    ', errors(u'\n        <span id="error_%s_%s" class="help-inline"><strong>%s</strong></span>\n    '), u'\n'])
+    else:
+        html.extend([u'\n    ', errors(u'\n        <p id="error_%s_%s" class="help-block"><strong>%s</strong></p>\n    '), u'\n'])
+    html.append(u'\n\n')
+    if not help_text_inline:
+        html.extend([u'\n    ', help_text(), u'\n'])
+    html.append(u'\n')
+    return u''.join(html)
+
+
+# Rendered in place of the fields of a layout object when compiling it, its
+# template output is split around it in the html before and after the fields
+FIELDS_MARKER = u'<!--crispy-fields-->'
+
+# Compiled html before and after the fields of layout objects, by
+# `wrapper_cache_key`
+_wrapper_cache = {}
+
+
+class FieldSlot(object):
+    """
+    Place of a form field in a render plan, filled in by `render_plan` calling
+    `render_field` with the template and attrs of the layout object holding it.
+    """
+    __slots__ = ('name', 'template', 'attrs')
+
+    def __init__(self, name, template=None, attrs=None):
+        self.name = name
+        self.template = template
+        self.attrs = attrs
+
+
+def compile_fields(fields, form_style):
+    """
+    Turns a list of fields and layout objects into a render plan: a flat list
+    of static html chunks, `FieldSlot` and layout objects that can only be
+    rendered per form.
+    """
+    plan = []
+    for field in fields:
+        if hasattr(field, 'compile'):
+            items = field.compile(form_style)
+        elif hasattr(field, 'render'):
+            items = [field]
+        else:
+            items = [FieldSlot(field)]
+
+        for item in items:
+            # Adjacent html chunks are joined
+            if isinstance(item, basestring) and plan and isinstance(plan[-1], basestring):
+                plan[-1] += item
+            else:
+                plan.append(item)
+    return plan
+
+
+def wrapper_cache_key(layout_object, form_style):
+    """
+    Key of the compiled html around the fields of `layout_object`, made of its
+    class and its attributes. Returns None if any attribute is something else
+    than a plain value, so the compiled html is not shared.
+    """
+    values = []
+    for name, value in sorted(layout_object.__dict__.items()):
+        if name == 'fields':
+            continue
+        if isinstance(value, Promise):
+            value = force_unicode(value)
+        if not isinstance(value, (basestring, int, long, float, bool, type(None))):
+            return None
+        values.append((name, value))
+    return (layout_object.__class__, form_style, get_language(), tuple(values))
+
+
+def compile_wrapper(layout_object, form_style, render):
+    """
+    Compiles a layout object wrapping its fields in a template. `render` is
+    called with the html of the fields and returns the html of the object,
+    it is called once with `FIELDS_MARKER` and the output is split around it.
+    The object is left to be rendered per form if its template doesn't output
+    the fields exactly once.
+    """
+    if not layout_object.fields:
+        return [layout_object]
+
+    key = None
+    if not settings.DEBUG:
+        key = wrapper_cache_key(layout_object, form_style)
+
+    chunks = _wrapper_cache.get(key) if key is not None else None
+    if chunks is None:
+        html = force_unicode(render(FIELDS_MARKER))
+        if html.count(FIELDS_MARKER) == 1:
+            chunks = tuple(html.split(FIELDS_MARKER))
+        else:
+            chunks = ()
+        if key is not None:
+            _wrapper_cache[key] = chunks
+
+    if not chunks:
+        return [layout_object]
+    return [chunks[0]] + compile_fields(layout_object.fields, form_style) + [chunks[1]]
+
+
+def render_plan(plan, form, form_style, context):
+    """
+    Renders a render plan built by `compile_fields` for `form`.
+    """
+    html = []
+    for item in plan:
+        if isinstance(item, basestring):
+            html.append(item)
+        elif isinstance(item, FieldSlot):
+            html.append(render_field(item.name, form, form_style, context,
+                template=item.template, attrs=item.attrs))
+        else:
+            html.append(render_field(item, form, form_style, context))
+    return u''.join(html)
+
+
 def flatatt(attrs):
     """
     Taken from django.core.utils
@@ -31,4 +31,8 @@ def autodiscover():
                 raise
 
     from exadmin import views
-    from exadmin import plugins
\ No newline at end of file
+    from exadmin.plugins import register_plugins
+    register_plugins(site)
+
+    # build the admin classes now, not in the first requests
+    site.warm_registry()
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Publish/subscribe channels carrying the change notifications of the admin to
+the push views. The channel is picked with the ``EXADMIN_PUSH_CHANNEL``
+setting, the dotted path of a ``BaseChannel`` subclass:
+
+``exadmin.channels.LocalChannel``
+    The default. Keeps the events in memory, so the listeners only see the
+    changes made in the same process. Fits the development server or a single
+    threaded worker.
+
+``exadmin.channels.CacheChannel``
+    Keeps the events in the Django cache, so all the workers sharing the cache
+    see them: memcached, or the database or file based caches for a bus backed
+    by the database or the file system. The listeners poll the cache.
+
+Each event has an id, growing by one for each event, the key of the model,
+``app_label.module_name``, and a dictionary of data.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.importlib import import_module
+
+
+class BaseChannel(object):
+
+    # Number of events kept for the late listeners
+    max_events = 1000
+    # Seconds between two polls of ``wait``
+    poll_interval = 1
+
+    def publish(self, key, data):
+        raise NotImplementedError
+
+    def last_id(self):
+        raise NotImplementedError
+
+    def get_events(self, last_id):
+        """
+        Returns the kept events with an id over ``last_id``, as
+        ``(id, key, data)`` tuples.
+        """
+        raise NotImplementedError
+
+    def wait(self, keys, last_id, timeout):
+        """
+        Waits at most ``timeout`` seconds for events of ``keys`` after
+        ``last_id``. Returns them with the id to wait from next.
+        """
+        deadline = time.time() + timeout
+        while True:
+            events = self.get_events(last_id)
+            if events:
+                last_id = events[-1][0]
+                events = [e for e in events if e[1] in keys]
+                if events:
+                    return events, last_id
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return [], last_id
+            time.sleep(min(self.poll_interval, remaining))
+
+
+class LocalChannel(BaseChannel):
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.events = deque(maxlen=self.max_events)
+        self.id = 0
+
+    def publish(self, key, data):
+        self.condition.acquire()
+        try:
+            self.id += 1
+            self.events.append((self.id, key, data))
+            self.condition.notify_all()
+        finally:
+            self.condition.release()
+
+    def last_id(self):
+        return self.id
+
+    def get_events(self, last_id):
+        return [e for e in list(self.events) if e[0] > last_id]
+
+    def wait(self, keys, last_id, timeout):
+        deadline = time.time() + timeout
+        self.condition.acquire()
+        try:
+            while True:
+                events = self.get_events(last_id)
+                if events:
+                    last_id = events[-1][0]
+                    events = [e for e in events if e[1] in keys]
+                    if events:
+                        return events, last_id
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return [], last_id
+                self.condition.wait(remaining)
+        finally:
+            self.condition.release()
+
+
+class CacheChannel(BaseChannel):
+
+    LAST_ID_KEY = 'exadmin:push:last'
+    EVENT_KEY = 'exadmin:push:event:%d'
+    timeout = 60 * 60
+
+    def publish(self, key, data):
+        cache.add(self.LAST_ID_KEY, 0, self.timeout)
+        try:
+            event_id = cache.incr(self.LAST_ID_KEY)
+        except ValueError:
+            # Expired between the add and the incr
+            cache.add(self.LAST_ID_KEY, 1, self.timeout)
+            event_id = 1
+        cache.set(self.EVENT_KEY % event_id, (key, data), self.timeout)
+
+    def last_id(self):
+        return cache.get(self.LAST_ID_KEY, 0)
+
+    def get_events(self, last_id):
+        current = self.last_id()
+        if current <= last_id:
+            return []
+        ids = range(max(last_id + 1, current - self.max_events + 1), current + 1)
+        events = cache.get_many([self.EVENT_KEY % i for i in ids])
+        return [(i,) + tuple(events[self.EVENT_KEY % i]) for i in ids if self.EVENT_KEY % i in events]
+
+
+_channel = None
+
+def get_channel():
+    global _channel
+    if _channel is None:
+        path = getattr(settings, 'EXADMIN_PUSH_CHANNEL', 'exadmin.channels.LocalChannel')
+        module, dot, name = path.rpartition('.')
+        try:
+            channel_class = getattr(import_module(module), name)
+        except (ImportError, AttributeError), e:
+            raise ImproperlyConfigured('Error importing push channel %s: "%s"' % (path, e))
+        _channel = channel_class()
+    return _channel
@@ -0,0 +1,174 @@
+from contextlib import contextmanager
+from operator import attrgetter
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import signals, sql
+from django.db.models.deletion import Collector
+from django.utils.hashcompat import md5_constructor
+
+# Cache key of the progress record of a delete job
+PROGRESS_KEY = 'exadmin:delete:%s'
+PROGRESS_TIMEOUT = 60 * 60 * 24
+
+
+def get_delete_job_id(queryset):
+    """
+    Returns a stable id for deleting ``queryset``, so a run of the same delete
+    after an interruption finds the progress of the previous one.
+    """
+    opts = queryset.model._meta
+    return md5_constructor('%s.%s:%s' % (opts.app_label, opts.module_name, queryset.query)).hexdigest()
+
+
+def get_delete_progress(job_id):
+    return cache.get(PROGRESS_KEY % job_id)
+
+
+class ChunkedDeleter(object):
+    """
+    Deletes the objects of ``queryset`` with all the objects they cascade to,
+    in batches of ``batch_size`` rows, each batch in its own short
+    transaction.
+
+    The roots are taken from ``queryset`` ``batch_size`` at a time and their
+    graph is collected, then deleted model by model following the collector
+    dependency order, like ``Collector.delete`` does. Deleted rows are gone
+    from the database, so running the same delete again after an
+    interruption resumes where the previous run stopped; the progress is
+    recorded in the cache under the job id and read by the delete progress
+    view.
+
+    When a batch of roots collects no more than ``batch_size`` objects, it is
+    simply deleted by the collector in one transaction. When the model
+    overrides ``delete``, the roots are deleted one by one with their own
+    ``delete``, a batch of them in each transaction.
+
+    ``revision`` is a ``BatchRevision`` of the versioning plugin, or any
+    context with a ``flush`` method. It is entered around the whole delete and
+    flushed in the transaction of each batch, so the versions of the deleted
+    objects are committed with their delete.
+    """
+
+    def __init__(self, queryset, using, batch_size=500, job_id=None, revision=None):
+        self.queryset = queryset
+        self.model = queryset.model
+        self.using = using
+        self.batch_size = batch_size
+        self.job_id = job_id or get_delete_job_id(queryset)
+        self.revision = revision
+
+        self.progress = get_delete_progress(self.job_id)
+        if self.progress is None or self.progress.get('finished'):
+            opts = self.model._meta
+            # The permission the progress view asks of who polls it
+            self.progress = {'deleted': 0, 'total': None, 'model': None, 'finished': False,
+                             'perm': '%s.%s' % (opts.app_label, opts.get_delete_permission())}
+
+    def save_progress(self, **kwargs):
+        self.progress.update(kwargs)
+        cache.set(PROGRESS_KEY % self.job_id, self.progress, PROGRESS_TIMEOUT)
+
+    def batches(self, items):
+        for i in xrange(0, len(items), self.batch_size):
+            yield items[i:i + self.batch_size]
+
+    def delete(self):
+        """
+        Runs the delete and returns the number of root objects deleted.
+        """
+        if self.revision is None:
+            return self.delete_batches()
+        with self.revision:
+            return self.delete_batches()
+
+    @contextmanager
+    def commit_batch(self):
+        """
+        The transaction of a batch, writing the versions of the objects it
+        deleted before the commit.
+        """
+        with transaction.commit_on_success(using=self.using):
+            yield
+            if self.revision is not None:
+                self.revision.flush()
+
+    def has_own_delete(self):
+        return self.model.delete.im_func is not models.Model.delete.im_func
+
+    def delete_batches(self):
+        if self.progress['total'] is None:
+            self.save_progress(total=self.queryset.count())
+
+        own_delete = self.has_own_delete()
+        deleted = 0
+        while True:
+            pks = list(self.queryset.values_list('pk', flat=True)[:self.batch_size])
+            if not pks:
+                break
+            roots = self.model._base_manager.using(self.using).filter(pk__in=pks)
+
+            if own_delete:
+                with self.commit_batch():
+                    for obj in roots:
+                        obj.delete(using=self.using)
+            else:
+                collector = Collector(using=self.using)
+                collector.collect(roots)
+                if sum([len(instances) for instances in collector.data.values()]) <= self.batch_size:
+                    with self.commit_batch():
+                        collector.delete()
+                else:
+                    self.delete_collected(collector)
+
+            deleted += len(pks)
+            self.save_progress(deleted=self.progress['deleted'] + len(pks))
+
+        self.save_progress(finished=True, model=None)
+        return deleted
+
+    def delete_collected(self, collector):
+        """
+        Same steps as ``Collector.delete``, with every step done in batches of
+        ``batch_size`` rows in their own transaction.
+        """
+        using = self.using
+
+        for model, instances in collector.data.items():
+            collector.data[model] = sorted(instances, key=attrgetter("pk"))
+        collector.sort()
+
+        # update fields
+        for model, instances_for_fieldvalues in collector.field_updates.iteritems():
+            query = sql.UpdateQuery(model)
+            for (field, value), instances in instances_for_fieldvalues.iteritems():
+                for pk_list in self.batches([obj.pk for obj in instances]):
+                    with transaction.commit_on_success(using=using):
+                        query.update_batch(pk_list, {field.name: value}, using)
+
+        # delete batches
+        for model, batches in collector.batches.iteritems():
+            query = sql.DeleteQuery(model)
+            for field, instances in batches.iteritems():
+                for pk_list in self.batches([obj.pk for obj in instances]):
+                    with transaction.commit_on_success(using=using):
+                        query.delete_batch(pk_list, using, field)
+
+        # delete instances, sort() puts the dependent models first
+        for model, instances in collector.data.items():
+            self.save_progress(model=unicode(model._meta.verbose_name_plural))
+            query = sql.DeleteQuery(model)
+            send_signals = not model._meta.auto_created
+            for objs in self.batches(list(reversed(instances))):
+                with self.commit_batch():
+                    # pre_delete is sent with the batch, the receivers never
+                    # act on objects a failed batch leaves in place
+                    if send_signals:
+                        for obj in objs:
+                            signals.pre_delete.send(sender=model, instance=obj, using=using)
+                    query.delete_batch([obj.pk for obj in objs], using)
+                    if send_signals:
+                        for obj in objs:
+                            signals.post_delete.send(sender=model, instance=obj, using=using)
+                for obj in objs:
+                    setattr(obj, model._meta.pk.attname, None)
@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import BaseFinder
+from django.core.files.storage import FileSystemStorage
+
+from exadmin.sites import I18N_STATIC_PATH, render_i18n_catalog
+
+
+class I18nCatalogFinder(BaseFinder):
+    """
+    Static files finder emitting the i18n JavaScript catalogue of the admin as
+    one static file per language of the ``LANGUAGES`` setting, so
+    ``collectstatic`` writes them with the other static files. Only used when
+    the ``EXADMIN_STATIC_JSI18N`` setting is set; add
+    ``'exadmin.finders.I18nCatalogFinder'`` to ``STATICFILES_FINDERS``.
+
+    The catalogues are rendered into a temporary directory, once per process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.storage = None
+
+    def get_storage(self):
+        if self.storage is None:
+            self.storage = FileSystemStorage(location=tempfile.mkdtemp(prefix='exadmin_jsi18n'))
+            for language, name in settings.LANGUAGES:
+                path = self.storage.path(I18N_STATIC_PATH % language)
+                if not os.path.exists(os.path.dirname(path)):
+                    os.makedirs(os.path.dirname(path))
+                with open(path, 'wb') as f:
+                    f.write(render_i18n_catalog(language))
+        return self.storage
+
+    def get_paths(self):
+        if not getattr(settings, 'EXADMIN_STATIC_JSI18N', False):
+            return []
+        return [I18N_STATIC_PATH % language for language, name in settings.LANGUAGES]
+
+    def find(self, path, all=False):
+        if path in self.get_paths():
+            path = self.get_storage().path(path)
+            return all and [path] or path
+        return []
+
+    def list(self, ignore_patterns):
+        for path in self.get_paths():
+            yield path, self.get_storage()
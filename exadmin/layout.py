@@ -5,6 +5,25 @@ from crispy_forms.utils import render_field, flatatt
 
 from crispy_forms import layout
 
+
+def copy_layout(layout_object):
+    """
+    Copies a layout, or a list of layout objects, for a view to change it.
+    Layout objects and their ``fields`` lists are copied, their other
+    attributes are shared with the original, which is much cheaper than a
+    deepcopy of the whole tree.
+    """
+    if isinstance(layout_object, (list, tuple)):
+        return type(layout_object)([copy_layout(lo) for lo in layout_object])
+    if isinstance(layout_object, basestring) or layout_object is None:
+        return layout_object
+
+    obj = layout_object.__class__.__new__(layout_object.__class__)
+    obj.__dict__.update(layout_object.__dict__)
+    if 'fields' in obj.__dict__:
+        obj.fields = [copy_layout(lo) for lo in obj.fields]
+    return obj
+
 class Fieldset(layout.Fieldset):
     template = "admin/fieldset.html"
 
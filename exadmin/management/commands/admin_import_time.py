@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import NoArgsCommand, CommandError
+from django.utils import simplejson
+
+# Run in a new interpreter each time, so nothing is imported yet.
+SCRIPT = """
+import time
+from django.utils import simplejson
+
+times = []
+def step(name, func):
+    start = time.time()
+    func()
+    times.append((name, time.time() - start))
+
+def import_views():
+    import exadmin.views
+
+def load_plugins():
+    from exadmin.sites import site
+    from exadmin.plugins import register_plugins
+    register_plugins(site)
+    site.load_plugins()
+
+def autodiscover():
+    import exadmin
+    exadmin.autodiscover()
+
+step('exadmin.views', import_views)
+step('plugins', load_plugins)
+step('autodiscover', autodiscover)
+print simplejson.dumps(times)
+"""
+
+
+class Command(NoArgsCommand):
+    help = "Measures the time spent importing the admin, its plugins and the xadmin modules in a new process."
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--repeat', action='store', dest='repeat', type='int', default=5,
+            help='Number of processes to run. Defaults to 5.'),
+        make_option('--max', action='store', dest='max', type='float', default=None,
+            help='Fails when the median total time is over this many milliseconds.'),
+    )
+
+    def run_once(self):
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = settings.SETTINGS_MODULE
+        env['PYTHONPATH'] = os.pathsep.join(sys.path)
+        process = subprocess.Popen([sys.executable, '-c', SCRIPT], stdout=subprocess.PIPE, env=env)
+        output = process.communicate()[0]
+        if process.returncode:
+            raise CommandError('The import process failed.')
+        return simplejson.loads(output.strip().splitlines()[-1])
+
+    def handle_noargs(self, **options):
+        runs = [self.run_once() for i in range(max(options.get('repeat'), 1))]
+
+        steps = [name for name, seconds in runs[0]] + ['total']
+        results = dict([(name, []) for name in steps])
+        for run in runs:
+            for name, seconds in run:
+                results[name].append(seconds * 1000)
+            results['total'].append(sum([seconds for name, seconds in run]) * 1000)
+
+        def median(values):
+            values = sorted(values)
+            return values[len(values) / 2]
+
+        if int(options.get('verbosity', 1)) > 0:
+            self.stdout.write("%-20s %10s %10s\n" % ('', 'min ms', 'median ms'))
+            for name in steps:
+                self.stdout.write("%-20s %10.1f %10.1f\n" % (name, min(results[name]), median(results[name])))
+
+        limit = options.get('max')
+        if limit is not None and median(results['total']) > limit:
+            raise CommandError('The admin import took %.1f ms, over %.1f ms.' % (median(results['total']), limit))
@@ -0,0 +1,35 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(NoArgsCommand):
+    help = ("Creates the indexes of the paginated object history on the tables of django-reversion. "
+            "syncdb only creates them with the tables, run this on the existing installs.")
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--database', action='store', dest='database', default=DEFAULT_DB_ALIAS,
+            help='Nominates the database of the revisions. Defaults to the "default" database.'),
+        make_option('--sql', action='store_true', dest='sql', default=False,
+            help='Prints the statements instead of running them.'),
+    )
+
+    def handle_noargs(self, **options):
+        from exadmin.models import history_index_sql, create_history_indexes
+        db = options.get('database')
+        verbosity = int(options.get('verbosity', 1))
+
+        if options.get('sql'):
+            for sql in history_index_sql(connections[db]):
+                self.stdout.write("%s\n" % sql)
+            return
+
+        for sql, error in create_history_indexes(db):
+            if verbosity == 0:
+                continue
+            if error is None:
+                self.stdout.write("%s\n" % sql)
+            else:
+                # already created, by syncdb or an earlier run
+                self.stdout.write("Skipped %s (%s)\n" % (sql, error))
@@ -0,0 +1,33 @@
+import time
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(NoArgsCommand):
+    help = ("Writes the revisions left in the revision outbox. With --interval, keeps "
+            "running as the outbox worker, processing the outbox every few seconds.")
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--database', action='store', dest='database', default=DEFAULT_DB_ALIAS,
+            help='Nominates the database of the outbox. Defaults to the "default" database.'),
+        make_option('--interval', action='store', dest='interval', type='float', default=None,
+            help='Seconds to wait before processing the outbox again. Runs once when not given.'),
+    )
+
+    def handle_noargs(self, **options):
+        from exadmin.plugins.xversion import process_revision_outbox
+        db = options.get('database')
+        interval = options.get('interval')
+        verbosity = int(options.get('verbosity', 1))
+        while True:
+            done = process_revision_outbox(db)
+            if verbosity > 1 or (verbosity > 0 and (done or interval is None)):
+                self.stdout.write("%d revisions written.\n" % done)
+                self.stdout.flush()
+            if interval is None:
+                break
+            # no connection is held while waiting
+            connections[db].close()
+            time.sleep(interval)
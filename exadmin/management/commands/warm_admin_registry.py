@@ -0,0 +1,20 @@
+from django.core.management.base import NoArgsCommand
+
+
+class Command(NoArgsCommand):
+    help = "Builds the admin view classes and reports the time spent for each model."
+
+    def handle_noargs(self, **options):
+        from django.core.urlresolvers import get_resolver
+        from exadmin.sites import site
+
+        # the URLconf runs autodiscover, which warms the registry
+        get_resolver(None).url_patterns
+        report = site.warm_report or site.warm_registry()
+
+        if int(options.get('verbosity', 1)) > 0:
+            total = 0
+            for name, seconds, built in report:
+                total += seconds
+                self.stdout.write("%-40s %4d classes %8.1f ms\n" % (name, built, seconds * 1000))
+            self.stdout.write("%-40s %21.1f ms\n" % ('total', total * 1000))
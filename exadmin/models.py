@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, connections, transaction, DatabaseError, DEFAULT_DB_ALIAS
+from django.db.models import signals
 from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.auth.models import User
@@ -95,3 +96,104 @@ class UserWidget(models.Model):
         
     class Meta:
         verbose_name = _('User Widget')
+
+try:
+    from reversion.models import Revision
+except ImportError:
+    Revision = None
+
+if Revision is not None:
+
+    class RevisionDelta(models.Model):
+        """
+        The fields written to an object by a summary revision, stored in
+        place of a full version of the object.
+        """
+        revision = models.ForeignKey(Revision)
+        content_type = models.ForeignKey(ContentType)
+        object_id = models.TextField()
+        object_id_int = models.IntegerField(blank=True, null=True, db_index=True)
+        object_repr = models.TextField()
+        delta = models.TextField()
+
+        def get_delta(self):
+            return simplejson.loads(self.delta)
+
+        def __unicode__(self):
+            return self.object_repr
+
+        class Meta:
+            verbose_name = _('Revision Delta')
+
+    class RevisionOutbox(models.Model):
+        """
+        A revision saved with the data of the request, and written to the
+        revision tables after the request by a worker.
+        """
+        manager_slug = models.CharField(max_length=200, default='default')
+        user = models.ForeignKey(User, blank=True, null=True)
+        comment = models.TextField(blank=True)
+        db = models.CharField(max_length=100)
+        date_created = models.DateTimeField(auto_now_add=True)
+        # json list of the content type, pk and version type of the saved
+        # objects, serialized by the worker with the relations they follow
+        saved = models.TextField()
+        # json list of the version data of the deleted objects
+        deleted = models.TextField()
+        claimed_at = models.DateTimeField(blank=True, null=True)
+
+        def __unicode__(self):
+            return self.comment
+
+        class Meta:
+            verbose_name = _('Revision Outbox')
+
+
+def history_index_sql(connection):
+    """
+    Returns the statements creating the indexes used by the paginated object
+    history, on the tables of django-reversion. They are created by syncdb
+    with the tables, and by the ``create_history_indexes`` command on the
+    existing installs.
+    """
+    from reversion.models import Revision, Version
+    qn = connection.ops.quote_name
+    return [
+        'CREATE INDEX %s ON %s (%s);' % (qn('exadmin_revision_date_created'),
+            qn(Revision._meta.db_table), qn('date_created')),
+        'CREATE INDEX %s ON %s (%s, %s, %s);' % (qn('exadmin_version_object'),
+            qn(Version._meta.db_table), qn('content_type_id'), qn('object_id_int'), qn('revision_id')),
+    ]
+
+
+def create_history_indexes(db=DEFAULT_DB_ALIAS):
+    """
+    Creates the indexes of ``history_index_sql`` on ``db``, each in its own
+    transaction. Returns the statements with the error of the ones that
+    failed, the indexes already there.
+    """
+    connection = connections[db]
+    results = []
+    for sql in history_index_sql(connection):
+        try:
+            with transaction.commit_on_success(using=db):
+                connection.cursor().execute(sql)
+        except DatabaseError, e:
+            results.append((sql, e))
+        else:
+            results.append((sql, None))
+    return results
+
+
+def _create_history_indexes(sender, created_models, db=DEFAULT_DB_ALIAS, **kwargs):
+    try:
+        from reversion.models import Revision
+    except ImportError:
+        return
+    # sent once per installed app, with all the models created by syncdb, and
+    # with all the models by flush, so the indexes may be there already
+    if sender.__name__ != Revision.__module__ or Revision not in created_models:
+        return
+    create_history_indexes(db)
+
+signals.post_syncdb.connect(_create_history_indexes)
@@ -1,3 +1,21 @@
+# The built-in plugin modules, in the order their plugins are registered
+PLUGINS = (
+    'actions', 'filters', 'relate', 'bookmark', 'export', 'refresh', 'sortable', 'details', 'ajax', 'editable',
+    'chart', 'relfield', 'inline', 'topnav', 'portal', 'quickform', 'wizard', 'images', 'xversion', 'auth',
+    'multiselect', 'themes', 'conditional', 'push',
+)
 
-import actions, filters, bookmark, export, refresh, sortable, details, editable, relate, chart, ajax, relfield, inline, topnav
-import portal, quickform, wizard, images, xversion, auth, multiselect, themes
\ No newline at end of file
+
+def register_plugins(site):
+    """
+    Registers the plugin modules in the ``EXADMIN_PLUGINS`` setting, dotted
+    paths of the modules, all the built-in modules by default. They are
+    imported when the admin views are first built.
+    """
+    from django.conf import settings
+
+    modules = getattr(settings, 'EXADMIN_PLUGINS', None)
+    if modules is None:
+        modules = ['exadmin.plugins.%s' % name for name in PLUGINS]
+    for module_path in modules:
+        site.register_plugin_module(module_path)
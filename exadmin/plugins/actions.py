@@ -9,8 +9,9 @@ from django.utils.datastructures import SortedDict
 from django.utils.encoding import force_unicode
 from django.utils.safestring import mark_safe
 from django.utils.translation import ugettext as _, ungettext
+from exadmin.deletion import ChunkedDeleter, get_delete_job_id
 from exadmin.sites import site
-from exadmin.util import model_format_dict, get_deleted_objects, model_ngettext
+from exadmin.util import model_format_dict, get_deleted_objects, get_deleted_summary, model_ngettext
 from exadmin.views import BaseAdminPlugin, ListAdminView
 from exadmin.views.base import filter_hook, ModelAdminView
 
@@ -36,6 +37,9 @@ class BaseActionView(ModelAdminView):
     def init_action(self, list_view):
         self.list_view = list_view
         self.admin_site = list_view.admin_site
+        # When select_across is set, the queryset is the whole filtered list,
+        # not a list of selected pks.
+        self.select_across = self.request.POST.get('select_across', False) == '1'
 
     @filter_hook
     def do_action(self, queryset):
@@ -49,17 +53,37 @@ class DeleteSelectedAction(BaseActionView):
     delete_confirmation_template = None
     delete_selected_confirmation_template = None
 
+    # Above this number of selected objects the confirmation page shows per-model
+    # counts instead of a link for every object that would be deleted.
+    delete_summary_threshold = 100
+    # Above this number of selected objects the delete runs in several short
+    # transactions of this size.
+    delete_chunk_size = 500
+
     model_perm = 'delete'
 
     @filter_hook
     def delete_models(self, queryset):
         n = queryset.count()
         if n:
-            queryset.delete()
+            if n > self.delete_chunk_size:
+                self.delete_in_chunks(queryset)
+            else:
+                queryset.delete()
             self.message_user(_("Successfully deleted %(count)d %(items)s.") % {
                 "count": n, "items": model_ngettext(self.opts, n)
             }, 'success')
 
+    @filter_hook
+    def get_deleter(self, queryset):
+        """
+        Returns the ``ChunkedDeleter`` of the selected objects.
+        """
+        return ChunkedDeleter(queryset, router.db_for_write(self.model), self.delete_chunk_size)
+
+    def delete_in_chunks(self, queryset):
+        self.get_deleter(queryset).delete()
+
     @filter_hook
     def do_action(self, queryset):
         # Check that the user has delete permission for the actual model
@@ -67,11 +91,16 @@ class DeleteSelectedAction(BaseActionView):
             raise PermissionDenied
 
         using = router.db_for_write(self.model)
+        objects_count = queryset.count()
 
         # Populate deletable_objects, a data structure of all related objects that
         # will also be deleted.
-        deletable_objects, perms_needed, protected = get_deleted_objects(
-            queryset, self.opts, self.user, self.admin_site, using)
+        if objects_count > self.delete_summary_threshold:
+            deletable_objects, perms_needed, protected = get_deleted_summary(
+                queryset, self.opts, self.user, self.admin_site, using)
+        else:
+            deletable_objects, perms_needed, protected = get_deleted_objects(
+                queryset, self.opts, self.user, self.admin_site, using)
 
         # The user has already confirmed the deletion.
         # Do the deletion and return a None to display the change list view again.
@@ -82,7 +111,7 @@ class DeleteSelectedAction(BaseActionView):
             # Return None to display the change list page again.
             return None
 
-        if len(queryset) == 1:
+        if objects_count == 1:
             objects_name = force_unicode(self.opts.verbose_name)
         else:
             objects_name = force_unicode(self.opts.verbose_name_plural)
@@ -96,8 +125,12 @@ class DeleteSelectedAction(BaseActionView):
         context.update({
             "title": title,
             "objects_name": objects_name,
+            "objects_count": objects_count,
             "deletable_objects": [deletable_objects],
             'queryset': queryset,
+            'select_across': self.select_across,
+            'delete_progress_url': objects_count > self.delete_chunk_size and \
+                self.admin_urlname('delete_progress', get_delete_job_id(queryset)),
             "perms_lacking": perms_needed,
             "protected": protected,
             "opts": self.opts,
@@ -112,6 +145,13 @@ class DeleteSelectedAction(BaseActionView):
             "admin/delete_selected_confirmation.html"
         ], context, current_app=self.admin_site.name)
 
+    @filter_hook
+    def get_media(self):
+        media = super(DeleteSelectedAction, self).get_media()
+        media.add_js([self.static('exadmin/js/delete.js')])
+        return media
+
+
 class ActionPlugin(BaseAdminPlugin):
 
     # Actions
@@ -2,6 +2,8 @@ from django.http import HttpResponse
 from django.utils import simplejson
 from django.utils.html import escape
 from django import forms
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
 from django.conf import settings
 from django.utils.html import conditional_escape
 from django.utils.encoding import StrAndUnicode, force_unicode
@@ -12,8 +14,12 @@ from django.utils.datastructures import SortedDict
 
 from exadmin.sites import site
 from exadmin.views import BaseAdminPlugin, ListAdminView, ModelFormAdminView, DetailAdminView
+from exadmin.views.base import JSONEncoder
+from exadmin.util import lookup_field, label_for_field
 
 NON_FIELD_ERRORS = '__all__'
+# Query string flag to stream the objects of the list
+STREAM_VAR = '_stream'
 
 class BaseAjaxPlugin(BaseAdminPlugin):
 
@@ -21,17 +27,77 @@ class BaseAjaxPlugin(BaseAdminPlugin):
         return bool(self.request.is_ajax() or self.request.REQUEST.get('_ajax'))
 
 class AjaxListPlugin(BaseAjaxPlugin):
-
-    def get_result_list(self, response):
+    """
+    JSON mode of the list. The columns are the ones of the list, picked from
+    the query string with ``_cols``. The values are serialized as they are by
+    ``JSONEncoder``, without going through the html cells of the list, so
+    consumers must escape them. When all the columns are plain fields of the
+    model they are fetched with ``values_list``. With ``_stream`` the objects
+    are written while they are read from the database.
+    """
+
+    def get_value_fields(self, fields):
+        """
+        Returns the attnames to fetch ``fields`` with ``values_list``, or
+        ``None`` when some of them need the model objects.
+        """
+        attnames = []
+        for name in fields:
+            try:
+                field = self.opts.get_field(name)
+            except models.FieldDoesNotExist:
+                return None
+            if field.rel:
+                return None
+            attnames.append(field.attname)
+        return attnames
+
+    def get_value(self, obj, field_name):
+        try:
+            f, attr, value = lookup_field(field_name, obj, self.admin_view)
+        except (AttributeError, ObjectDoesNotExist):
+            return None
+        return value
+
+    def get_objects(self, fields):
         av = self.admin_view
-        base_fields = av.base_list_display
-        headers = dict([(c.field_name, c.text) for c in av.result_headers().cells if c.field_name in base_fields])
+        result_list = av.result_list
+        stream = bool(self.request.GET.get(STREAM_VAR))
+
+        value_fields = self.get_value_fields(fields)
+        if value_fields is not None and hasattr(result_list, 'values_list'):
+            rows = result_list.values_list(*value_fields)
+            return (dict(zip(fields, row)) for row in (stream and rows.iterator() or rows))
+
+        if stream and hasattr(result_list, 'iterator'):
+            result_list = result_list.iterator()
+        return (dict([(f, self.get_value(obj, f)) for f in fields]) for obj in result_list)
+
+    def stream_response(self, content, objects):
+        def stream():
+            yield simplejson.dumps(content, cls=JSONEncoder, ensure_ascii=False)[:-1] + ', "objects": ['
+            for i, obj in enumerate(objects):
+                yield (i and ', ' or '') + simplejson.dumps(obj, cls=JSONEncoder, ensure_ascii=False)
+            yield ']}'
+        return HttpResponse(stream(), mimetype="application/json; charset=UTF-8")
 
-        objects = [dict([(o.field_name, escape(str(o.value))) for i,o in \
-            enumerate(filter(lambda c:c.field_name in base_fields, r.cells))]) \
-            for r in av.results()]
+    def get_result_list(self, response):
+        if response:
+            return response
 
-        return self.render_response({'headers': headers, 'objects': objects, 'total_count': av.result_count, 'has_more': av.has_more})
+        av = self.admin_view
+        fields = [f for f in av.list_display if f in av.base_list_display]
+        content = {
+            'headers': dict([(f, label_for_field(f, av.model, model_admin=av)) for f in fields]),
+            'total_count': av.result_count,
+            'has_more': av.has_more,
+        }
+        objects = self.get_objects(fields)
+
+        if self.request.GET.get(STREAM_VAR):
+            return self.stream_response(content, objects)
+        content['objects'] = list(objects)
+        return self.render_response(content)
 
 class JsonErrorDict(forms.util.ErrorDict):
 
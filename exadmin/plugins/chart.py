@@ -81,6 +81,7 @@ class JSONEncoder(DjangoJSONEncoder):
 class ChartsPlugin(BaseAdminPlugin):
 
     data_charts = {}
+    required_options = ('data_charts',)
 
     def get_chart_url(self, name, v):
         return self.admin_view.model_admin_urlname('chart', name) + self.admin_view.get_query_string()
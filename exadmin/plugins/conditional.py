@@ -0,0 +1,182 @@
+import time
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import signals, Max, Count
+from django.http import HttpResponseNotModified
+from django.utils.hashcompat import md5_constructor
+from django.utils.http import http_date
+from django.utils.translation import get_language
+
+from exadmin.sites import site
+from exadmin.models import Bookmark, UserSettings, UserWidget
+from exadmin.views import BaseAdminPlugin, ListAdminView, DetailAdminView, Dashboard
+
+# Cache key of the version of a model, the time of its last change
+MODEL_VERSION_KEY = 'exadmin:version:%s.%s'
+MODEL_VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+# The admin pages show the user settings, widgets and bookmarks too
+SITE_MODELS = (Bookmark, UserSettings, UserWidget)
+
+
+def _version_key(model):
+    return MODEL_VERSION_KEY % (model._meta.app_label, model._meta.module_name)
+
+
+def bump_model_version(model):
+    cache.set(_version_key(model), time.time(), MODEL_VERSION_TIMEOUT)
+
+
+def get_model_versions(models):
+    """
+    Returns the versions of ``models``, in one cache request. A model with no
+    version in the cache gets one now, so a flushed cache changes the etags.
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in versions:
+            cache.add(key, now, MODEL_VERSION_TIMEOUT)
+            versions[key] = now
+    return [versions[key] for key in keys]
+
+
+def _model_changed(sender, **kwargs):
+    bump_model_version(sender)
+
+
+def _m2m_changed(sender, instance, model, **kwargs):
+    bump_model_version(instance.__class__)
+    bump_model_version(model)
+
+_tracked_models = set()
+
+
+def track_model(model):
+    """
+    Bumps the version of ``model`` whenever one of its objects is saved or
+    deleted, or its many to many relations change.
+    """
+    if model in _tracked_models:
+        return
+    _tracked_models.add(model)
+    signals.post_save.connect(_model_changed, sender=model)
+    signals.post_delete.connect(_model_changed, sender=model)
+    for field in model._meta.many_to_many:
+        signals.m2m_changed.connect(_m2m_changed, sender=field.rel.through)
+
+
+def get_version_models(model, inlines=()):
+    """
+    Returns the models whose changes change the pages of ``model``: the model,
+    the models of its relations and inlines, and the site models.
+    """
+    opts = model._meta
+    models = [model]
+    models.extend([f.rel.to for f in opts.fields + opts.many_to_many if f.rel])
+    models.extend([inline.model for inline in inlines])
+    return models + list(SITE_MODELS)
+
+
+def track_registered_models(admin_site):
+    """
+    Tracks the models of all the pages of ``admin_site``. Called when the
+    plugin is loaded, once the models are registered, so every process
+    serving the admin sees the saves it makes, even before it serves a
+    conditional page. Models registered later are tracked when their pages
+    are first served.
+    """
+    for model, admin_class in admin_site._registry.items():
+        for version_model in get_version_models(model, getattr(admin_class, 'inlines', [])):
+            track_model(version_model)
+
+
+class ConditionalGetPlugin(BaseAdminPlugin):
+    """
+    Answers the GET requests of an unchanged page with a 304, without
+    rendering it.
+
+    The etag of the page is computed from the path and query string, the
+    language, the user and their permissions, and the versions of the models
+    the page shows: the model, the models of its relations and inlines, and
+    the user settings, widgets and bookmarks. Every save or delete of these
+    models changes their version. Changes made without signals, like
+    ``QuerySet.update``, are only seen when ``conditional_version_field``
+    names a field, like an ``updated_at``, whose max is then part of the
+    etag with the count of objects.
+
+    The versions are kept in the ``django.core.cache`` cache, which must be
+    shared by all the processes serving the site, like memcached or the
+    database cache: with the per process ``locmem`` cache, the default one,
+    a save made by a process would not change the etags of the others. The
+    plugin refuses to run with it.
+
+    Pages with pending messages are always rendered, without an etag, so the
+    messages are shown on them.
+    """
+
+    conditional_get = False
+    conditional_version_field = None
+
+    required_options = ('conditional_get',)
+
+    def init_request(self, *args, **kwargs):
+        if isinstance(cache, LocMemCache):
+            raise ImproperlyConfigured("conditional_get needs a cache shared by all the processes "
+                "serving the site, the locmem cache is per process.")
+
+    def get_version_models(self):
+        return get_version_models(self.model, getattr(self.admin_view, 'inlines', []))
+
+    def get_data_version(self):
+        models = self.get_version_models()
+        for model in models:
+            track_model(model)
+        versions = get_model_versions(models)
+        if self.conditional_version_field:
+            aggregate = self.admin_view.queryset().aggregate(
+                Max(self.conditional_version_field), Count('pk'))
+            versions.append(sorted(aggregate.items()))
+        return versions
+
+    def get_etag(self, versions):
+        user = self.user
+        data = [self.request.path, sorted(self.request.GET.lists()), self.request.is_ajax(),
+            get_language(), user.pk, user.is_superuser, sorted(user.get_all_permissions()), versions]
+        return '"%s"' % md5_constructor(repr(data)).hexdigest()
+
+    def get(self, __, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+            return __()
+
+        versions = self.get_data_version()
+        etag = self.get_etag(versions)
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [e.strip() for e in if_none_match.split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            response = __()
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(max([v for v in versions if isinstance(v, float)]))
+        return response
+    # Outermost, so nothing is computed for an unchanged page
+    get.priority = 0
+
+
+class DashboardConditionalGetPlugin(ConditionalGetPlugin):
+
+    def get_version_models(self):
+        return self.admin_site._registry.keys() + list(SITE_MODELS)
+
+
+track_registered_models(site)
+
+site.register_plugin(ConditionalGetPlugin, ListAdminView)
+site.register_plugin(ConditionalGetPlugin, DetailAdminView)
+site.register_plugin(DashboardConditionalGetPlugin, Dashboard)
@@ -12,6 +12,10 @@ class DetailsPlugin(BaseAdminPlugin):
     show_detail_fields = []
     show_all_rel_details = True
 
+    @classmethod
+    def is_active(cls):
+        return bool(cls.show_all_rel_details or cls.show_detail_fields)
+
     def result_item(self, item, obj, field_name, row):
         if hasattr(item.field, 'rel') and isinstance(item.field.rel, models.ManyToOneRel) \
             and (self.show_all_rel_details or (field_name in self.show_detail_fields)):
@@ -1,5 +1,5 @@
 from django import forms
-from django.core.exceptions import PermissionDenied, ObjectDoesNotExist
+from django.core.exceptions import PermissionDenied, ObjectDoesNotExist, ValidationError
 from django.db import models, transaction
 from django.forms.models import modelform_factory
 from django.http import Http404
@@ -7,8 +7,9 @@ from django.template import loader
 from django.utils.encoding import force_unicode, smart_unicode
 from django.utils.html import escape, conditional_escape
 from django.utils.safestring import mark_safe
+from django.utils.datastructures import SortedDict
 from django.utils.translation import ugettext as _
-from exadmin.plugins.ajax import JsonErrorDict
+from exadmin.plugins.ajax import JsonErrorDict, NON_FIELD_ERRORS
 from exadmin.sites import site
 from exadmin.util import lookup_field, display_for_field, label_for_field, unquote, boolean_icon
 from exadmin.views import BaseAdminPlugin, ModelFormAdminView, ListAdminView
@@ -20,6 +21,7 @@ from exadmin.views.list import EMPTY_CHANGELIST_VALUE
 class EditablePlugin(BaseAdminPlugin):
 
     list_editable = []
+    required_options = ('list_editable',)
 
     def __init__(self, admin_view):
         super(EditablePlugin, self).__init__(admin_view)
@@ -69,6 +71,9 @@ class EditablePlugin(BaseAdminPlugin):
 
 class EditPatchView(ModelFormAdminView, ListAdminView):
 
+    # Keys of the objects saved by the post
+    saved_pks = ()
+
     def get_new_field_html(self, f):
         result = self.result_item(self.org_obj, f, {'is_display_first': False, 'object': self.org_obj})
         return mark_safe(result.text) if result.allow_tags else conditional_escape(result.text)
@@ -99,6 +104,29 @@ class EditPatchView(ModelFormAdminView, ListAdminView):
                     text = display_for_field(value, f)
             return mark_safe(text) if allow_tags else conditional_escape(text)
 
+    def get_patch_form(self, fields):
+        """
+        Returns the form class editing ``fields``, cached per field set when
+        ``form_class_cache`` is set.
+        """
+        defaults = {
+            "form": forms.ModelForm,
+            "fields": sorted(fields),
+            "formfield_callback": self.formfield_for_dbfield,
+        }
+        return self.get_form_class(modelform_factory, self.model, **defaults)
+
+    def get_patch_result(self, form, fields):
+        result = {}
+        if form.is_valid():
+            result['result'] = 'success'
+            result['new_data'] = form.cleaned_data
+            result['new_html'] = dict([(f, self.get_new_field_html(f)) for f in fields])
+        else:
+            result['result'] = 'error'
+            result['errors'] = JsonErrorDict(form.errors, form).as_json()
+        return result
+
     @filter_hook
     @csrf_protect_m
     @transaction.commit_on_success
@@ -117,28 +145,89 @@ class EditPatchView(ModelFormAdminView, ListAdminView):
         model_fields = [str(pk) + '-' + f.name for f in self.opts.fields]
         fields = [f[len(str(pk)) + 1:] for f in request.POST.keys() if f in model_fields]
 
-        defaults = {
-            "form": forms.ModelForm,
-            "fields": fields,
-            "formfield_callback": self.formfield_for_dbfield,
-        }
-        form_class = modelform_factory(self.model, **defaults)
-        form = form_class(instance=self.org_obj, data=request.POST, files=request.FILES)
-        form.prefix = str(pk)
+        form_class = self.get_patch_form(fields)
+        form = form_class(instance=self.org_obj, data=request.POST, files=request.FILES, prefix=str(pk))
 
-        result = {}
         if form.is_valid():
             form.save(commit=True)
-            result['result'] = 'success'
-            result['new_data'] = form.cleaned_data
-            result['new_html'] = dict([(f, self.get_new_field_html(f)) for f in fields])
-        else:
-            result['result'] = 'error'
-            result['errors'] = JsonErrorDict(form.errors, form).as_json()
+            self.saved_pks = [force_unicode(self.org_obj.pk)]
+
+        return self.render_response(self.get_patch_result(form, fields))
+
+class BulkEditPatchView(EditPatchView):
+    """
+    Patches many objects in one request. The posted data uses the same
+    ``<pk>-<field>`` names as ``EditPatchView``, the objects are loaded in one
+    query and saved in one transaction, only if every row is valid.
+    """
+
+    # Saves many objects at once, the plugins can batch their work
+    batch_save = True
+
+    @filter_hook
+    @csrf_protect_m
+    @transaction.commit_on_success
+    def post(self, request):
+        if not self.has_change_permission():
+            raise PermissionDenied
 
-        return self.render_response(result)
+        model_fields = [f.name for f in self.opts.fields]
+        row_fields = SortedDict()
+        for key in request.POST.keys():
+            pk, sep, field_name = key.rpartition('-')
+            if sep and field_name in model_fields:
+                row_fields.setdefault(pk, []).append(field_name)
+
+        # The posted keys are matched as pk values, so "01" finds the object 1
+        pk_field = self.opts.pk
+        pks = {}
+        for pk in row_fields.keys():
+            try:
+                pks[pk] = pk_field.to_python(pk)
+            except ValidationError:
+                pass
+        objs = dict([(obj.pk, obj) for obj in self.queryset().filter(pk__in=pks.values())])
+
+        # One form class per field set, shared by the rows posting it
+        form_classes = {}
+        for fields in row_fields.values():
+            key = tuple(sorted(fields))
+            if key not in form_classes:
+                form_classes[key] = self.get_patch_form(fields)
+
+        results = {}
+        forms_list = []
+        for pk, fields in row_fields.items():
+            obj = objs.get(pks.get(pk))
+            if obj is None:
+                results[pk] = {'result': 'error', 'errors': [{'id': NON_FIELD_ERRORS, 'name': NON_FIELD_ERRORS,
+                    'errors': [_('%(name)s object with primary key %(key)r does not exist.') % \
+                        {'name': force_unicode(self.opts.verbose_name), 'key': escape(pk)}]}]}
+                continue
+            if not self.has_change_permission(obj):
+                raise PermissionDenied
+            form = form_classes[tuple(sorted(fields))](instance=obj, data=request.POST, files=request.FILES, prefix=pk)
+            forms_list.append((pk, obj, form, fields))
+
+        all_valid = not results
+        for pk, obj, form, fields in forms_list:
+            all_valid = form.is_valid() and all_valid
+
+        if all_valid:
+            self.saved_pks = [force_unicode(obj.pk) for pk, obj, form, fields in forms_list]
+        for pk, obj, form, fields in forms_list:
+            if all_valid:
+                form.save(commit=True)
+            self.org_obj = obj
+            results[pk] = self.get_patch_result(form, fields)
+            if not all_valid and results[pk]['result'] == 'success':
+                # Valid rows are not saved when another row has errors.
+                results[pk] = {'result': 'skipped'}
+
+        return self.render_response({'result': all_valid and 'success' or 'error', 'objects': results})
 
 site.register_plugin(EditablePlugin, ListAdminView)
 site.register_modelview(r'^(.+)/patch/$', EditPatchView, name='%s_%s_patch')
+site.register_modelview(r'^patch/$', BulkEditPatchView, name='%s_%s_bulkpatch')
 
 
@@ -22,7 +22,11 @@ class ExportPlugin(BaseAdminPlugin):
     list_export = ('xls', 'csv', 'xml', 'json')
     export_mimes = {'xls': 'application/vnd.ms-excel', 'csv': 'text/csv', 'xml': 'application/xhtml+xml', 'json': 'application/json'}
     export_names = {'xls': 'Excel', 'csv': 'CSV', 'xml': 'XML', 'json': 'JSON'}
-    
+
+    @classmethod
+    def is_active(cls):
+        return bool([f for f in cls.list_export if f != 'xls' or has_xlwt])
+
     def init_request(self, *args, **kwargs):
         self.list_export = [f for f in self.list_export if f != 'xls' or has_xlwt]
 
@@ -1,11 +1,14 @@
-import copy
-
 from django import forms
-from django.forms.formsets import all_valid, DELETION_FIELD_NAME
-from django.forms.models import inlineformset_factory, BaseInlineFormSet
+from django.core.exceptions import ValidationError
+from django.core.validators import EMPTY_VALUES
+from django.forms.formsets import all_valid, DELETION_FIELD_NAME, INITIAL_FORM_COUNT
+from django.db.models.related import RelatedObject
+from django.forms.models import inlineformset_factory, BaseInlineFormSet, _get_foreign_key
+from django.http import HttpResponse
 from django.template import loader, Context
 from django.template.loader import render_to_string
-from exadmin.layout import FormHelper, Layout, flatatt, Container, Column, Field, Fieldset
+from django.utils.http import urlencode
+from exadmin.layout import FormHelper, Layout, flatatt, Container, Column, Field, Fieldset, copy_layout
 from exadmin.sites import site
 from exadmin.views import BaseAdminPlugin, ModelFormAdminView, DetailAdminView, filter_hook
 
@@ -38,6 +41,28 @@ class DeleteField(Field):
 class TDField(Field):
     template = "admin/layout/td-field.html"
 
+class PostedRowField(forms.ModelChoiceField):
+    """
+    The pk field of a posted row of an inline formset. The pk is looked up in
+    the rows the formset fetched, instead of a query for each row.
+    """
+
+    def __init__(self, formset, field):
+        super(PostedRowField, self).__init__(field.queryset, required=field.required,
+            widget=field.widget, initial=field.initial)
+        self.formset = formset
+
+    def to_python(self, value):
+        if value in EMPTY_VALUES:
+            return None
+        try:
+            obj = self.formset._existing_object(self.formset.model._meta.pk.to_python(value))
+        except ValidationError:
+            obj = None
+        if obj is None:
+            raise ValidationError(self.error_messages['invalid_choice'])
+        return obj
+
 class InlineStyleManager(object):
     inline_styles = {}
 
@@ -48,6 +73,10 @@ class InlineStyleManager(object):
 
 style_manager = InlineStyleManager()
 
+# GET parameters of the request loading a page of inline rows
+INLINE_VAR = '_inline'
+INLINE_START_VAR = '_inline_start'
+
 class InlineStyle(object):
     template = 'admin/edit_inline/stacked.html'
     def __init__(self, view, formset):
@@ -98,6 +127,8 @@ class InlineModelAdmin(ModelFormAdminView):
     fields = []
     admin_view = None
     style = None
+    # Existing rows rendered per page, the next pages are loaded on demand
+    per_page = 50
 
     def init(self, admin_view):
         self.admin_view = admin_view
@@ -134,30 +165,125 @@ class InlineModelAdmin(ModelFormAdminView):
             "can_delete": can_delete,
         }
         defaults.update(kwargs)
-        return inlineformset_factory(self.parent_model, self.model, **defaults)
+        return self.get_form_class(inlineformset_factory, self.parent_model, self.model, **defaults)
+
+    @property
+    def prefix(self):
+        """
+        The default prefix of the formset, read on every request. Derived from
+        the foreign key, like ``BaseInlineFormSet`` does, without building the
+        formset class.
+        """
+        if not hasattr(self, '_prefix'):
+            if self.formset.get_default_prefix.im_func is BaseInlineFormSet.get_default_prefix.im_func:
+                fk = _get_foreign_key(self.parent_model, self.model, fk_name=self.fk_name)
+                self._prefix = RelatedObject(fk.rel.to, self.model, fk).get_accessor_name().replace('+', '')
+            else:
+                self._prefix = self.get_formset().get_default_prefix()
+        return self._prefix
+
+    @property
+    def page_start(self):
+        """
+        Index of the first row to load when the request loads a page of rows
+        of this inline, None otherwise.
+        """
+        if self.request_method == 'get' and self.request.GET.get(INLINE_VAR) == self.prefix:
+            try:
+                return max(int(self.request.GET.get(INLINE_START_VAR, 0)), 0)
+            except ValueError:
+                return 0
+        return None
+
+    def get_page_queryset(self, formset, queryset, start):
+        """
+        Returns ``queryset`` limited to ``per_page`` rows of the object from
+        ``start``, and the number of rows left after them.
+        """
+        rows = queryset.filter(**{formset.fk.name: self.model_instance})
+        if not rows.ordered:
+            rows = rows.order_by(self.opts.pk.name)
+        pks = list(rows.values_list('pk', flat=True)[start:start + self.per_page + 1])
+
+        if len(pks) > self.per_page:
+            more_count = rows.count() - start - self.per_page
+        else:
+            more_count = 0
+        return queryset.filter(pk__in=pks[:self.per_page]), more_count
+
+    def get_posted_queryset(self, formset, queryset):
+        """
+        Returns ``queryset`` limited to the rows posted, the rows of the pages
+        not loaded by the user are left untouched.
+        """
+        data = self.request.POST
+        prefix = formset.get_default_prefix()
+        try:
+            initial_count = int(data.get('%s-%s' % (prefix, INITIAL_FORM_COUNT), 0))
+        except ValueError:
+            # the formset reports the broken management form
+            return queryset
+
+        pk_field = self.opts.pk
+        pks = []
+        for i in xrange(min(initial_count, len(data))):
+            value = data.get('%s-%s-%s' % (prefix, i, pk_field.name))
+            if value:
+                try:
+                    pks.append(pk_field.to_python(value))
+                except ValidationError:
+                    pass
+        return queryset.filter(pk__in=pks)
 
     @filter_hook
     def instance_form(self, **kwargs):
+        start = self.page_start
+        if start is not None:
+            kwargs['extra'] = 0
         formset = self.get_formset(**kwargs)
         attrs = {
             'instance': self.model_instance,
             'queryset': self.queryset()
         }
+        paginate = self.per_page and self.model_instance.pk is not None
+        more_count = 0
+
         if self.request_method == 'post':
             attrs.update({
                     'data': self.request.POST, 'files': self.request.FILES,
                     'save_as_new': "_saveasnew" in self.request.POST
                 })
+            if paginate:
+                attrs['queryset'] = self.get_posted_queryset(formset, attrs['queryset'])
+        elif paginate:
+            attrs['queryset'], more_count = self.get_page_queryset(formset, attrs['queryset'], start or 0)
+
         instance = formset(**attrs)
         instance.view = self
 
+        if instance.is_bound:
+            # Every posted row is validated, unchanged or not
+            pk_name = self.opts.pk.name
+            for form in instance.initial_forms:
+                if type(form.fields.get(pk_name)) is forms.ModelChoiceField:
+                    form.fields[pk_name] = PostedRowField(instance, form.fields[pk_name])
+        loaded = (start or 0) + instance.initial_form_count()
+        if paginate and instance.is_bound and not instance.save_as_new:
+            # only needed if the form is shown again with its errors
+            instance.more_count = lambda: self.get_page_queryset(formset, self.queryset(), loaded)[1]
+        else:
+            instance.more_count = more_count
+        if paginate:
+            instance.more_url = '%s?%s' % (self.request.path,
+                urlencode({INLINE_VAR: instance.prefix, INLINE_START_VAR: loaded}))
+
         helper = FormHelper()
         helper.form_tag = False
 
         style = style_manager.get_style('one' if self.max_num == 1 else self.style)(self, instance)
 
         if len(instance):
-            layout = copy.deepcopy(self.form_layout)
+            layout = copy_layout(self.form_layout)
 
             if layout is None:
                 layout = Layout(*instance[0].fields.keys())
@@ -280,8 +406,19 @@ class InlineFormsetPlugin(BaseAdminPlugin):
             self._inline_instances = inline_instances
         return self._inline_instances
 
+    @property
+    def page_inlines(self):
+        """
+        The inlines to build formsets for, only the one loading a page of rows
+        if the request does so.
+        """
+        prefix = self.request.GET.get(INLINE_VAR)
+        if self.request.method == 'GET' and prefix:
+            return [inline for inline in self.inline_instances if inline.prefix == prefix]
+        return self.inline_instances
+
     def instance_forms(self, ret):
-        self.formsets = [inline.instance_form() for inline in self.inline_instances]
+        self.formsets = [inline.instance_form() for inline in self.page_inlines]
         self.admin_view.formsets = self.formsets
 
     def valid_forms(self, result):
@@ -320,6 +457,14 @@ class InlineFormsetPlugin(BaseAdminPlugin):
 
         return layout
 
+    def get_response(self, __, *args, **kwargs):
+        if self.request.GET.get(INLINE_VAR) and len(self.formsets) == 1:
+            # Rows of a page of the inline, the formset template is rendered
+            # and the client picks the rows from it
+            formset = InlineFormset(self.formsets[0], isinstance(self.admin_view, DetailAdminView))
+            return HttpResponse(formset.render(None, '', None))
+        return __()
+
     def get_media(self, media):
         for fs in self.formsets:
             media = media + fs.media
@@ -352,7 +497,7 @@ class DetailInlineFormsetPlugin(InlineFormsetPlugin):
         return formset
 
     def get_model_form(self, form, **kwargs):
-        self.formsets = [self._get_formset_instance(inline) for inline in self.inline_instances]
+        self.formsets = [self._get_formset_instance(inline) for inline in self.page_inlines]
         return form
 
 site.register_plugin(InlineFormsetPlugin, ModelFormAdminView)
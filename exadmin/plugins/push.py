@@ -0,0 +1,202 @@
+import time
+
+from django.core.exceptions import PermissionDenied
+from django.db import models
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils import simplejson
+
+from exadmin.channels import get_channel
+from exadmin.sites import site
+from exadmin.views import BaseAdminPlugin, BaseAdminView, ListAdminView, CreateAdminView, UpdateAdminView, \
+    DeleteAdminView, Dashboard
+from exadmin.views.base import JSONEncoder
+from exadmin.views.dashboard import ModelBaseWidget
+from exadmin.plugins.actions import ACTION_CHECKBOX_NAME
+from exadmin.plugins.editable import EditPatchView
+from exadmin.plugins.refresh import REFRESH_VAR
+
+MODELS_VAR = 'models'
+LAST_ID_VAR = 'last_id'
+
+
+def model_key(model):
+    return '%s.%s' % (model._meta.app_label, model._meta.module_name)
+
+
+def publish_change(model, pks=None):
+    get_channel().publish(model_key(model), {'model': model_key(model), 'pks': pks})
+
+
+class PushAdminView(BaseAdminView):
+    """
+    Server sent events stream of the changes of the models named in the
+    ``models`` parameter, as ``app_label.module_name`` keys separated by
+    commas. The user needs the change permission of each model. The
+    connection is closed after ``push_timeout`` seconds and the browser
+    reconnects, sending the id of the last event it got.
+
+    Each open stream keeps a worker busy, so the site needs a threaded or
+    asynchronous server, and no middleware reading the whole response, like
+    ``GZipMiddleware``, ``ConditionalGetMiddleware`` or ``USE_ETAGS``.
+    """
+
+    push_timeout = 60
+    # Seconds between two comments, keeping the proxies from closing the
+    # connection
+    push_heartbeat = 15
+    push_retry = 3000
+
+    def get_keys(self):
+        keys = []
+        for key in self.request.GET.get(MODELS_VAR, '').split(','):
+            model = models.get_model(*key.split('.', 1)) if '.' in key else None
+            if model is not None and model in self.admin_site._registry and self.has_model_perm(model, 'change'):
+                keys.append(model_key(model))
+        return keys
+
+    def stream(self, keys, last_id):
+        channel = get_channel()
+        yield 'retry: %d\n\n' % self.push_retry
+
+        deadline = time.time() + self.push_timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            events, last_id = channel.wait(keys, last_id, min(self.push_heartbeat, remaining))
+            for event_id, key, data in events:
+                yield 'id: %d\nevent: change\ndata: %s\n\n' % (
+                    event_id, simplejson.dumps(data, cls=JSONEncoder))
+            if not events:
+                yield ': %d\n\n' % last_id
+
+    def get(self, request, *args, **kwargs):
+        keys = self.get_keys()
+        if not keys:
+            # Nothing to wait for, no worker is held
+            raise PermissionDenied
+        channel = get_channel()
+        last_id = channel.last_id()
+        try:
+            # The channel may have been reset since, by a restart
+            last_id = min(int(request.META.get('HTTP_LAST_EVENT_ID') or request.GET[LAST_ID_VAR]), last_id)
+        except (KeyError, ValueError):
+            pass
+
+        response = HttpResponse(self.stream(keys, last_id), mimetype='text/event-stream')
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class PushPlugin(BaseAdminPlugin):
+    """
+    Publishes the changes made in the admin views of the model to the push
+    channel, when ``push_changes`` is set. Lists refreshed with the
+    ``RefreshPlugin`` then wait for these changes on the push view, and only
+    poll ten times slower than their refresh time.
+
+    Only the writes made through the admin are published: the changes made
+    elsewhere, by other code or by agents writing the rows directly, are only
+    seen by the slow polling. The channel must reach all the processes
+    serving the site: the default ``LocalChannel`` only carries the changes
+    of its own process, so with more than one process set
+    ``EXADMIN_PUSH_CHANNEL`` to ``exadmin.channels.CacheChannel`` with a
+    shared cache, see ``exadmin.channels``.
+    """
+
+    push_changes = False
+    required_options = ('push_changes',)
+
+    def publish(self, pks=None):
+        publish_change(self.model, pks)
+
+    def get_push_url(self, models):
+        return '%s?%s=%s' % (self.admin_urlname('push'), MODELS_VAR, ','.join([model_key(m) for m in models]))
+
+
+class ListPushPlugin(PushPlugin):
+
+    def get_context(self, context):
+        if self.request.GET.get(REFRESH_VAR):
+            context['push_url'] = self.get_push_url([self.model])
+        return context
+
+    # Actions, done when they redirect back to the list
+    def post_response(self, response, *args, **kwargs):
+        if 'action' in self.request.POST and isinstance(response, HttpResponseRedirect):
+            if self.request.POST.get('select_across', False) == '1':
+                self.publish()
+            else:
+                self.publish(self.request.POST.getlist(ACTION_CHECKBOX_NAME))
+        return response
+    # Outermost, to see the response of the actions
+    post_response.priority = 0
+
+
+class FormPushPlugin(PushPlugin):
+
+    def post_response(self, response):
+        self.publish([self.admin_view.new_obj.pk])
+        return response
+    # Outermost, so the plugins answering the post themselves, like the ajax
+    # forms, are covered too
+    post_response.priority = 0
+
+
+class DeletePushPlugin(PushPlugin):
+
+    def delete_model(self, __):
+        pk = self.admin_view.obj.pk
+        __()
+        self.publish([pk])
+
+
+class PatchPushPlugin(PushPlugin):
+
+    def post(self, response, request, *args, **kwargs):
+        # Nothing is saved when a form is not valid
+        if self.admin_view.saved_pks:
+            self.publish(list(self.admin_view.saved_pks))
+        return response
+
+
+class DashboardPushPlugin(BaseAdminPlugin):
+    """
+    Reloads the model widgets of the dashboard when one of their models
+    changes, for the models whose admin sets ``push_changes``.
+    """
+
+    def init_request(self, *args, **kwargs):
+        self.widget_models = None
+
+    def get_widget_models(self):
+        if self.widget_models is None:
+            self.widget_models = {}
+            for col in getattr(self.admin_view, 'widgets', []):
+                for widget in col:
+                    if isinstance(widget, ModelBaseWidget) and \
+                            getattr(self.admin_site._registry.get(widget.model), 'push_changes', False):
+                        self.widget_models.setdefault(model_key(widget.model), []).append(widget.id)
+        return self.widget_models
+
+    def get_context(self, context):
+        widget_models = self.get_widget_models()
+        if widget_models:
+            context['push_url'] = '%s?%s=%s' % (self.admin_urlname('push'), MODELS_VAR, ','.join(widget_models.keys()))
+            context['push_widgets'] = simplejson.dumps(widget_models)
+        return context
+
+    def get_media(self, media):
+        if self.get_widget_models():
+            media.add_js([self.static('exadmin/js/push.js')])
+        return media
+
+
+site.register_view(r'^push/$', PushAdminView, name='push')
+
+site.register_plugin(ListPushPlugin, ListAdminView)
+site.register_plugin(FormPushPlugin, CreateAdminView)
+site.register_plugin(FormPushPlugin, UpdateAdminView)
+site.register_plugin(DeletePushPlugin, DeleteAdminView)
+site.register_plugin(PatchPushPlugin, EditPatchView)
+site.register_plugin(DashboardPushPlugin, Dashboard)
@@ -19,12 +19,14 @@ class QuickFormPlugin(BaseAdminPlugin):
 
     def get_model_form(self, __, **kwargs):
         if '_field' in self.request.GET:
+            # Only the model fields, the names are part of the form cache key
+            field_names = [f.name for f in self.opts.fields + self.opts.many_to_many]
             defaults = {
                 "form": self.admin_view.form,
-                "fields": self.request.GET['_field'].split(','),
+                "fields": [f for f in self.request.GET['_field'].split(',') if f in field_names],
                 "formfield_callback": self.admin_view.formfield_for_dbfield,
             }
-            return modelform_factory(self.model, **defaults)
+            return self.admin_view.get_form_class(modelform_factory, self.model, **defaults)
         return __()
 
     def get_context(self, context):
@@ -89,6 +91,13 @@ class QuickAddBtnPlugin(BaseAdminPlugin):
     # def init_request(self, *args, **kwargs):
     #     return not self.request.is_ajax()
 
+    def get_form_cache_key(self, key):
+        # The add buttons depend on the user permissions.
+        rel_models = [get_model_from_relation(f) for f in (self.opts.fields + self.opts.many_to_many) \
+            if isinstance(f, (models.ForeignKey, models.ManyToManyField))]
+        return key + (tuple([rel_model in self.admin_site._registry and self.has_model_perm(rel_model, 'add') \
+            for rel_model in rel_models]),)
+
     def formfield_for_dbfield(self, formfield, db_field, **kwargs):
         if isinstance(db_field, (models.ForeignKey, models.ManyToManyField)):
             rel_model = get_model_from_relation(db_field)
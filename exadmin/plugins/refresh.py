@@ -1,15 +1,95 @@
+import datetime
 
-
+from django.core.exceptions import ValidationError
+from django.db.models import Max
 from django.template import loader
+from django.utils.encoding import smart_unicode
 
 from exadmin.sites import site
 from exadmin.views import BaseAdminPlugin, ListAdminView
 
 REFRESH_VAR = '_refresh'
+# Query string of the delta requests, the cursor of the last seen change
+DELTA_VAR = '_delta'
 
 class RefreshPlugin(BaseAdminPlugin):
+    """
+    Refreshes the list every ``refresh_times`` seconds. By default the page
+    is reloaded. When ``refresh_delta_field`` names a field growing with each
+    change of an object, like an ``updated_at`` with ``auto_now`` or the
+    primary key of an append only model, the page only asks for the rows
+    changed since the last refresh, and patches them in: changed rows are
+    replaced, new ones are added on top of the list. The field should be
+    indexed. Deleted objects, or objects not matching the filters of the list
+    anymore, stay until the next reload of the page.
+
+    The rows at the cursor are sent again, as the field may have no more than
+    second precision. For a date or datetime field, the rows changed in the
+    ``refresh_delta_lookback`` seconds before the cursor are sent again too,
+    for the transactions committed after the cursor was read.
+    """
 
     refresh_times = []
+    refresh_delta_field = None
+    refresh_delta_lookback = 5
+    required_options = ('refresh_times',)
+
+    def init_request(self, *args, **kwargs):
+        self.delta_cursor = None
+        return True
+
+    def dump_cursor(self, value):
+        if value is None:
+            return ''
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return smart_unicode(value)
+
+    def get_cursor(self, queryset):
+        return queryset.aggregate(cursor=Max(self.refresh_delta_field))['cursor']
+
+    def get_delta_response(self, cursor):
+        av = self.admin_view
+        queryset = av.get_list_queryset()
+        try:
+            cursor = cursor and self.opts.get_field(self.refresh_delta_field).to_python(cursor) or None
+        except ValidationError:
+            return self.render_response({'reload': True})
+        if cursor is not None:
+            since = cursor
+            if isinstance(cursor, datetime.date) and self.refresh_delta_lookback:
+                since = cursor - datetime.timedelta(seconds=self.refresh_delta_lookback)
+            queryset = queryset.filter(**{'%s__gte' % self.refresh_delta_field: since})
+
+        # More changes than a page, the client reloads the whole page
+        objects = list(queryset[:av.list_per_page + 1])
+        if len(objects) > av.list_per_page:
+            return self.render_response({'reload': True})
+
+        rows = []
+        for obj in objects:
+            row = av.result_row(obj)
+            rows.append({
+                'pk': smart_unicode(obj.pk),
+                'html': loader.render_to_string('admin/includes/result_row.html', {'row': row}),
+            })
+            value = getattr(obj, self.refresh_delta_field)
+            if value is not None and (cursor is None or value > cursor):
+                cursor = value
+        return self.render_response({
+            'reload': False,
+            'cursor': self.dump_cursor(cursor),
+            'rows': rows,
+        })
+
+    def get_result_list(self, __):
+        if not self.refresh_delta_field or not self.request.GET.get(REFRESH_VAR):
+            return __()
+        if DELTA_VAR in self.request.GET:
+            return self.get_delta_response(self.request.GET[DELTA_VAR])
+        # Read before the list, so no change is missed between them
+        self.delta_cursor = self.dump_cursor(self.get_cursor(self.admin_view.queryset()))
+        return __()
 
     # Media
     def get_media(self, media):
@@ -25,6 +105,8 @@ class RefreshPlugin(BaseAdminPlugin):
                 'has_refresh': bool(current_refresh),
                 'clean_refresh_url': self.admin_view.get_query_string(remove=(REFRESH_VAR,)),
                 'current_refresh': current_refresh,
+                'has_delta': self.delta_cursor is not None,
+                'delta_cursor': self.delta_cursor,
                 'refresh_times': [{
                     'time': r,
                     'url': self.admin_view.get_query_string({REFRESH_VAR: r}),
@@ -35,5 +117,3 @@ class RefreshPlugin(BaseAdminPlugin):
 
 
 site.register_plugin(RefreshPlugin, ListAdminView)
-
-
@@ -5,13 +5,15 @@ from django.utils.text import Truncator
 from django.utils.translation import ugettext as _
 from django import forms
 from exadmin.sites import site
+from exadmin.util import cached_reverse
 from exadmin.views import BaseAdminPlugin, ModelFormAdminView
 
 class ForeignKeySearchWidget(forms.TextInput):
 
     def __init__(self, rel, admin_view, attrs=None, using=None):
         self.rel = rel
-        self.admin_view = admin_view
+        # Not the view, the widget may outlive the request in a cached form
+        self.admin_site = admin_view.admin_site
         self.db = using
         super(ForeignKeySearchWidget, self).__init__(attrs)
 
@@ -23,7 +25,8 @@ class ForeignKeySearchWidget(forms.TextInput):
             attrs['class'] = 'select-search'
         else:
             attrs['class'] = attrs['class'] + ' select-search'
-        attrs['data-search-url'] = self.admin_view.admin_urlname('%s_%s_changelist' % (to_opts.app_label, to_opts.module_name))
+        attrs['data-search-url'] = cached_reverse('%s:%s_%s_changelist' % (
+            self.admin_site.app_name, to_opts.app_label, to_opts.module_name))
         attrs['data-placeholder'] = _('Search for a %s') % to_opts.verbose_name
         if value:
             attrs['data-label'] = self.label_for_value(value)
@@ -40,6 +43,11 @@ class ForeignKeySearchWidget(forms.TextInput):
 
 class RelateFieldPlugin(BaseAdminPlugin):
 
+    def get_form_cache_key(self, key):
+        # The search widgets depend on the user permissions.
+        return key + (tuple([f.rel.to in self.admin_view.admin_site._registry and self.has_model_perm(f.rel.to, 'change') \
+            for f in self.opts.fields if isinstance(f, models.ForeignKey)]),)
+
     def get_field_style(self, attrs, db_field, style, **kwargs):
         # search able fk field
         if style == 'fk-ajax' and isinstance(db_field, models.ForeignKey):
@@ -10,6 +10,7 @@ SORTBY_VAR = '_sort_by'
 class SortablePlugin(BaseAdminPlugin):
 
     sortable_fields = ['sort']
+    required_options = ('sortable_fields',)
 
     # Media
     def get_media(self, media):
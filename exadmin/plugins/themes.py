@@ -19,8 +19,7 @@ class ThemePlugin(BaseAdminPlugin):
     user_themes = None
     default_theme = static('exadmin/css/bootstrap-exadmin.css')
 
-    def init_request(self, *args, **kwargs):
-        return self.enable_themes
+    required_options = ('enable_themes',)
 
     def _get_theme(self):
         if self.user:
@@ -1,11 +1,21 @@
 import re
 from django import forms
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
 from django.template import loader
 from django.contrib.formtools.wizard.storage import get_storage
+from django.contrib.formtools.wizard.storage.base import BaseStorage
+from django.contrib.formtools.wizard.storage.exceptions import NoFileStorageConfigured
 from django.contrib.formtools.wizard.forms import ManagementForm
 from django.contrib.formtools.wizard.views import StepsHelper
-from django.utils.datastructures import SortedDict
+from django.utils.crypto import get_random_string
+from django.utils.datastructures import SortedDict, MultiValueDict
+from django.utils.encoding import smart_str
+from django.utils.hashcompat import md5_constructor
+from django.utils.translation import get_language
 from django.forms import ValidationError
+from django.forms.forms import NON_FIELD_ERRORS
+from django.forms.util import ErrorDict
 from django.forms.models import modelform_factory
 from exadmin.sites import site
 from exadmin.views import BaseAdminPlugin, ModelFormAdminView
@@ -14,17 +24,163 @@ def normalize_name(name):
     new = re.sub('(((?<=[a-z])[A-Z])|([A-Z](?![A-Z]|$)))', '_\\1', name)
     return new.lower().strip('_')
 
+# Cache key of an entry of a wizard state, by wizard id and entry name
+WIZARD_CACHE_KEY = 'exadmin:wizard:%s:%s'
+WIZARD_STATE = '_state'
+
+
+class CacheStorage(BaseStorage):
+    """
+    Wizard storage keeping the state of the wizard in the cache, the data of
+    each step in its own entry, so posting a step only writes that step. The
+    session only holds the id of the wizard.
+
+    The cleaned data of the validated steps is kept too, for the
+    ``convert`` callbacks, the templates and the done step, which then only
+    validates the object as a whole instead of every step again.
+
+    Opt-in, not the default storage of the wizards: set ``storage_name`` to
+    use it, with a cache shared by all the processes serving the site, not
+    the per process ``locmem`` cache.
+    """
+    timeout = 60 * 60 * 24
+
+    def __init__(self, *args, **kwargs):
+        super(CacheStorage, self).__init__(*args, **kwargs)
+        self.wizard_id = self.request.session.get(self.prefix)
+        self._state = None
+        self._steps = {}
+        if self.wizard_id is None:
+            self.init_data()
+
+    def cache_key(self, name):
+        # step names are free text, not usable as cache keys as they are
+        return WIZARD_CACHE_KEY % (self.wizard_id, md5_constructor(smart_str(name)).hexdigest())
+
+    def init_data(self):
+        if self.wizard_id is None:
+            self.wizard_id = get_random_string(32)
+            self.request.session[self.prefix] = self.wizard_id
+        else:
+            cache.delete_many([self.cache_key(step) for step in self.state['steps']])
+
+        self._state = {'step': None, 'extra_data': {}, 'steps': []}
+        self._steps = {}
+        self.save_state()
+
+    @property
+    def state(self):
+        if self._state is None:
+            self._state = cache.get(self.cache_key(WIZARD_STATE)) or \
+                {'step': None, 'extra_data': {}, 'steps': []}
+        return self._state
+
+    def save_state(self):
+        cache.set(self.cache_key(WIZARD_STATE), self.state, self.timeout)
+
+    def get_step(self, step):
+        if step not in self._steps:
+            entry = None
+            if step in self.state['steps']:
+                entry = cache.get(self.cache_key(step))
+            self._steps[step] = entry or {'data': None, 'files': {}, 'cleaned_data': None}
+        return self._steps[step]
+
+    def save_step(self, step):
+        cache.set(self.cache_key(step), self.get_step(step), self.timeout)
+        if step not in self.state['steps']:
+            self.state['steps'].append(step)
+            self.save_state()
+
+    def _get_current_step(self):
+        return self.state['step']
+
+    def _set_current_step(self, step):
+        if self.state['step'] != step:
+            self.state['step'] = step
+            self.save_state()
+
+    def _get_extra_data(self):
+        return self.state['extra_data']
+
+    def _set_extra_data(self, extra_data):
+        self.state['extra_data'] = extra_data
+        self.save_state()
+
+    def get_step_data(self, step):
+        values = self.get_step(step)['data']
+        if values is not None:
+            values = MultiValueDict(values)
+        return values
+
+    def set_step_data(self, step, cleaned_data):
+        if isinstance(cleaned_data, MultiValueDict):
+            cleaned_data = dict(cleaned_data.lists())
+        entry = self.get_step(step)
+        entry['data'] = cleaned_data
+        entry['cleaned_data'] = None
+        self.save_step(step)
+
+    def get_step_files(self, step):
+        wizard_files = self.get_step(step)['files']
+
+        if wizard_files and not self.file_storage:
+            raise NoFileStorageConfigured
+
+        files = {}
+        for field, field_dict in wizard_files.iteritems():
+            field_dict = dict((smart_str(k), v) for k, v in field_dict.iteritems())
+            tmp_name = field_dict.pop('tmp_name')
+            files[field] = UploadedFile(file=self.file_storage.open(tmp_name), **field_dict)
+        return files or None
+
+    def set_step_files(self, step, files):
+        if files and not self.file_storage:
+            raise NoFileStorageConfigured
+
+        entry = self.get_step(step)
+        for field, field_file in (files or {}).iteritems():
+            tmp_filename = self.file_storage.save(field_file.name, field_file)
+            entry['files'][field] = {
+                'tmp_name': tmp_filename,
+                'name': field_file.name,
+                'content_type': field_file.content_type,
+                'size': field_file.size,
+                'charset': field_file.charset
+            }
+        if files:
+            self.save_step(step)
+
+    def get_step_cleaned_data(self, step):
+        return self.get_step(step)['cleaned_data']
+
+    def set_step_cleaned_data(self, step, cleaned_data):
+        self.get_step(step)['cleaned_data'] = cleaned_data
+        self.save_step(step)
+
+
+# Step lists of the wizards, by admin view class and language
+_form_lists = {}
+# Model form classes of the steps, by admin view class, step fields and form
+# cache key of the view
+_step_forms = {}
+
+
 class WizardFormPlugin(BaseAdminPlugin):
 
     wizard_form_list = None
     wizard_for_update = False
 
+    # Set to 'exadmin.plugins.wizard.CacheStorage' to keep the steps in the
+    # cache, with a cache shared by all the processes serving the site
     storage_name = 'django.contrib.formtools.wizard.storage.session.SessionStorage'
     form_list = None
     initial_dict = None
     instance_dict = None
     condition_dict = None
 
+    required_options = ('wizard_form_list',)
+
     def _get_form_prefix(self, step=None):
         if step is None:
             step = self.steps.current
@@ -32,23 +188,35 @@ class WizardFormPlugin(BaseAdminPlugin):
 
     def get_form_list(self):
         if not hasattr(self, '_form_list'):
-            init_form_list = SortedDict()
+            # step names may be lazy translations, keep one list per language
+            key = (self.admin_view.__class__, get_language())
+            if key not in _form_lists:
+                init_form_list = SortedDict()
 
-            assert len(self.wizard_form_list) > 0, 'at least one form is needed'
+                assert len(self.wizard_form_list) > 0, 'at least one form is needed'
 
-            for i, form in enumerate(self.wizard_form_list):
-                init_form_list[unicode(form[0])] = form[1]
+                for i, form in enumerate(self.wizard_form_list):
+                    init_form_list[unicode(form[0])] = form[1]
 
-            self._form_list = init_form_list
+                _form_lists[key] = init_form_list
+            self._form_list = _form_lists[key]
 
         return self._form_list
 
+    def _get_step_model_form(self, fields=None):
+        # Built once per view class, whatever form_class_cache says: the step
+        # forms must not depend on the request past get_form_cache_key
+        key = (self.admin_view.__class__, tuple(fields or ()), self.admin_view.get_form_cache_key())
+        if key not in _step_forms:
+            _step_forms[key] = modelform_factory(self.model, form=forms.ModelForm,
+                fields=fields, formfield_callback=self.admin_view.formfield_for_dbfield)
+        return _step_forms[key]
+
     # Plugin replace methods
     def init_request(self, *args, **kwargs):
         if self.request.is_ajax() or ("_ajax" in self.request.GET) or not hasattr(self.request, 'session') or (args and not self.wizard_for_update):
             #update view
             return False
-        return bool(self.wizard_form_list)
 
     def prepare_form(self, __):
         # init storage and step helper
@@ -57,6 +225,7 @@ class WizardFormPlugin(BaseAdminPlugin):
             getattr(self, 'file_storage', None))
         self.steps = StepsHelper(self)
         self.wizard_goto_step = False
+        self.done_form_obj = None
 
         if self.request.method == 'GET':
             self.storage.reset()
@@ -102,12 +271,10 @@ class WizardFormPlugin(BaseAdminPlugin):
             step = self.steps.current
         attrs = self.get_form_list()[step]
         if type(attrs) in (list, tuple):
-            return modelform_factory(self.model, form=forms.ModelForm, \
-                fields=attrs, formfield_callback=self.admin_view.formfield_for_dbfield)
+            return self._get_step_model_form(attrs)
         elif type(attrs) is dict:
             if attrs.get('fields', None):
-                return modelform_factory(self.model, form=forms.ModelForm, \
-                    fields=attrs['fields'], formfield_callback=self.admin_view.formfield_for_dbfield)
+                return self._get_step_model_form(attrs['fields'])
             if attrs.get('callback', None):
                 callback = attrs['callback']
                 if callable(callback):
@@ -122,10 +289,18 @@ class WizardFormPlugin(BaseAdminPlugin):
         if step is None:
             step = self.steps.current
         form = self.get_step_form(step)
-        return form(prefix=self._get_form_prefix(step),
+        form_obj = form(prefix=self._get_form_prefix(step),
             data=self.storage.get_step_data(step),
             files=self.storage.get_step_files(step))
 
+        # The step was validated when posted, its cleaned data is reused
+        get_cleaned_data = getattr(self.storage, 'get_step_cleaned_data', None)
+        cleaned_data = get_cleaned_data and get_cleaned_data(step)
+        if cleaned_data is not None and isinstance(form_obj, forms.BaseForm):
+            form_obj.cleaned_data = cleaned_data
+            form_obj._errors = ErrorDict()
+        return form_obj
+
     def get_form_datas(self, datas):
         datas['prefix'] = self._get_form_prefix()
         if self.request.method == 'POST' and self.wizard_goto_step:
@@ -141,18 +316,86 @@ class WizardFormPlugin(BaseAdminPlugin):
             return False
         return __()
     
+    def get_done_form(self):
+        """
+        Returns the model form of the model fields of all the steps, bound to
+        the data posted in the steps. It validates the object as a whole, with
+        the model ``clean`` and the unique checks, when the wizard is done.
+
+        When the storage kept the cleaned data of every step, the fields are
+        not cleaned again, the form gets the cleaned data of the steps and
+        only the object is validated.
+        """
+        model_fields = [f.name for f in self.opts.fields + self.opts.many_to_many]
+        get_cleaned_data = getattr(self.storage, 'get_step_cleaned_data', None)
+        fields, data, files, cleaned_data = [], MultiValueDict(), MultiValueDict(), {}
+        for step in self.get_form_list().keys():
+            step_fields = getattr(self.get_step_form(step), 'base_fields', {}).keys()
+            step_fields = [f for f in step_fields if f in model_fields and f not in fields]
+            fields.extend(step_fields)
+
+            step_cleaned_data = get_cleaned_data and get_cleaned_data(step)
+            if step_cleaned_data is None:
+                get_cleaned_data = None
+            else:
+                cleaned_data.update([(f, step_cleaned_data[f]) for f in step_fields if f in step_cleaned_data])
+
+            prefix = self._get_form_prefix(step) + '-'
+            for key, values in (self.storage.get_step_data(step) or MultiValueDict()).lists():
+                if key.startswith(prefix):
+                    data.setlist(key[len(prefix):], values)
+            for key, value in (self.storage.get_step_files(step) or {}).items():
+                if key.startswith(prefix):
+                    files[key[len(prefix):]] = value
+
+        instance = self.admin_view.org_obj or self.model()
+        # The model values the ``convert`` callbacks of the steps computed
+        if [attrs for attrs in self.get_form_list().values() if type(attrs) is dict and attrs.has_key('convert')]:
+            converted = self.get_all_cleaned_data()
+            for f in self.opts.fields:
+                if f.name in converted and f.name not in fields:
+                    f.save_form_data(instance, converted[f.name])
+
+        form_obj = self._get_step_model_form(fields)(data=data, files=files, instance=instance)
+        if get_cleaned_data is not None:
+            # The steps were validated when posted, only the object is now
+            form_obj.cleaned_data = cleaned_data
+            form_obj._errors = ErrorDict()
+            form_obj._clean_form()
+            form_obj._post_clean()
+            if form_obj._errors:
+                del form_obj.cleaned_data
+        return form_obj
+
     def _done(self):
-        cleaned_data = self.get_all_cleaned_data()
-        form = modelform_factory(self.model, form=forms.ModelForm, 
-            formfield_callback=self.admin_view.formfield_for_dbfield)
-        form_obj = form(data=cleaned_data, instance=self.admin_view.org_obj)
-        self.admin_view.new_obj = form_obj.save(commit=True)
+        form_obj = self.get_done_form()
+        if form_obj.is_valid():
+            self.admin_view.new_obj = form_obj.save(commit=True)
+            return
+
+        # Back to the first step with an error, the errors not bound to the
+        # fields of a step are shown on the last one
+        errors = form_obj.errors
+        for step in self.get_form_list().keys():
+            step_fields = getattr(self.get_step_form(step), 'base_fields', {}).keys()
+            if step == self.steps.last or [f for f in step_fields if f in errors]:
+                break
+        self.storage.current_step = step
+        step_form_obj = self.get_step_form_obj(step)
+        step_form_obj.is_valid()
+        for name, error in errors.items():
+            if name in step_form_obj.fields or (name == NON_FIELD_ERRORS and step == self.steps.last):
+                step_form_obj._errors[name] = error
+        self.done_form_obj = step_form_obj
 
     def save_forms(self, __):
         # if the form is valid, store the cleaned data and files.
         form_obj = self.admin_view.form_obj
         self.storage.set_step_data(self.steps.current, form_obj.data)
         self.storage.set_step_files(self.steps.current, form_obj.files)
+        # uploaded files are opened again from the file storage
+        if hasattr(self.storage, 'set_step_cleaned_data') and not form_obj.files:
+            self.storage.set_step_cleaned_data(self.steps.current, form_obj.cleaned_data)
 
         # check if the current step is the last step
         if self.steps.current == self.steps.last:
@@ -179,6 +422,12 @@ class WizardFormPlugin(BaseAdminPlugin):
         return response
 
     def post_response(self, __):
+        if self.done_form_obj is not None:
+            # The steps are not valid as a whole
+            self.admin_view.form_obj = self.done_form_obj
+            self.admin_view.setup_forms()
+            return self.admin_view.get_response()
+
         if self.steps.current == self.steps.last:
             self.storage.reset()
             return __()
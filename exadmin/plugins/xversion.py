@@ -1,16 +1,28 @@
+import datetime
+import logging
 from functools import partial
+from Queue import Queue
+from threading import local, Lock, Thread
 
+from django.conf import settings
 from django.contrib.contenttypes.generic import GenericInlineModelAdmin, GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import PermissionDenied
-from django.db import models
-from django.db.models.query import QuerySet
-from django.db.models.related import RelatedObject
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core import serializers
+from django.core.serializers.base import DeserializationError
+from django.db import models, transaction, connections, DatabaseError, DEFAULT_DB_ALIAS
+from django.db.models import Q, signals
+from django.db.models.fields import FieldDoesNotExist
 from django.forms.models import model_to_dict
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404
 from django.template.response import TemplateResponse
-from django.utils.encoding import force_unicode
+from django.utils import simplejson, timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.datastructures import SortedDict
+from django.utils.encoding import force_unicode, smart_unicode
 from django.utils.safestring import mark_safe
 from django.utils.text import capfirst
 from django.utils.translation import ugettext as _
@@ -18,12 +30,66 @@ from exadmin.layout import Field, render_field
 from exadmin.plugins.actions import BaseActionView
 from exadmin.plugins.inline import InlineModelAdmin
 from exadmin.sites import site
-from exadmin.util import unquote, quote, model_format_dict
+from exadmin.util import unquote, quote, model_format_dict, model_ngettext, display_for_field
 from exadmin.views import BaseAdminPlugin, ModelAdminView, CreateAdminView, UpdateAdminView, DetailAdminView, ModelFormAdminView, DeleteAdminView, ListAdminView
 from exadmin.views.base import csrf_protect_m, filter_hook
 from exadmin.views.detail import DetailAdminUtil
-from reversion.models import Revision, Version
-from reversion.revisions import default_revision_manager, RegistrationError
+from exadmin.models import RevisionDelta, RevisionOutbox
+import reversion
+from reversion.models import Revision, Version, VERSION_ADD, VERSION_CHANGE, VERSION_DELETE, \
+    pre_revision_commit, post_revision_commit
+from reversion.revisions import default_revision_manager, revision_context_manager, RegistrationError, \
+    RevisionManager, has_int_pk
+
+
+class ReversionInternals(object):
+    """
+    The private parts of reversion used by the revisions of this module, kept
+    in one place. They change between the versions of reversion, so the
+    installed version is checked against the ones this was written for. With
+    any other version, the revisions fall back to reversion's own, one
+    version per object, see ``revision``.
+    """
+    supported_versions = ((1, 6),)
+
+    def __init__(self):
+        self.supported = tuple(reversion.VERSION[:2]) in self.supported_versions
+        if not self.supported:
+            logging.warning("exadmin batch revisions need django-reversion %s, %s is installed, "
+                "reversion's own revisions are used instead" % (
+                ' or '.join(['%d.%d' % v for v in self.supported_versions]),
+                '.'.join([str(v) for v in reversion.VERSION])))
+
+    def context_manager(self, revision_manager):
+        return getattr(revision_manager, '_revision_context_manager', revision_context_manager)
+
+    def revision(self, revision_class, revision_manager, **kwargs):
+        """
+        Returns a ``revision_class`` revision, or a ``PlainRevision`` when the
+        installed reversion is not supported.
+        """
+        if self.supported:
+            return revision_class(revision_manager, **kwargs)
+        return PlainRevision(self.context_manager(revision_manager), **kwargs)
+
+    def start_manual(self, revision_manager):
+        """
+        Starts a manually managed revision, reversion's own receivers stay
+        quiet until it ends.
+        """
+        self.context_manager(revision_manager).start(manage_manually=True)
+
+    def end(self, revision_manager):
+        self.context_manager(revision_manager).end()
+
+    def follow_relationships(self, revision_manager, objs):
+        """Returns ``objs`` and the objects their registrations follow."""
+        return revision_manager._follow_relationships(objs)
+
+    def manager_slug(self, revision_manager):
+        return revision_manager._manager_slug
+
+reversion_internals = ReversionInternals()
 
 
 def _autoregister(admin, model, follow=None):
@@ -36,6 +102,107 @@ def _autoregister(admin, model, follow=None):
             follow.append(field.name)
             _autoregister(admin, parent_cls)
         admin.revision_manager.register(model, follow=follow, format=admin.reversion_format)
+    _connect_batch_receivers(model)
+
+# Cache key of the fields changed between two versions, versions never change
+VERSION_DIFF_KEY = 'exadmin:version_diff:%s:%s'
+VERSION_DIFF_TIMEOUT = 60 * 60 * 24 * 7
+
+HISTORY_CURSOR_VAR = '_cursor'
+HISTORY_USER_VAR = '_user'
+HISTORY_FROM_VAR = '_from'
+HISTORY_TO_VAR = '_to'
+# Stands for the version id in the revision url, built once per page
+HISTORY_URL_ID = '999999999'
+
+RECOVER_SEARCH_VAR = '_q'
+RECOVER_SELECTED_VAR = '_selected_version'
+RECOVER_ALL_VAR = '_recover_all'
+
+
+def get_version_fields(version, opts):
+    """
+    Returns the field values stored in ``version``, a version of a model with
+    options ``opts``, by field name. Json data is read as it is stored, without
+    building the object of the version.
+    """
+    if not hasattr(version, '_version_fields'):
+        if version.format == 'json' and not opts.parents:
+            data = simplejson.loads(version.serialized_data)[0]
+            fields = data['fields']
+            fields[opts.pk.name] = data['pk']
+        else:
+            fields = version.field_dict
+        version._version_fields = fields
+    return version._version_fields
+
+
+def _diff_value(value):
+    # m2m values are lists of pks in no particular order
+    if isinstance(value, (list, tuple)):
+        return sorted(value)
+    return value
+
+
+def _diff_fields(version_a, version_b, opts):
+    fields_a = get_version_fields(version_a, opts)
+    fields_b = get_version_fields(version_b, opts)
+    changes = []
+    for f in (opts.fields + opts.many_to_many):
+        value_a = fields_a.get(f.name)
+        value_b = fields_b.get(f.name)
+        if _diff_value(value_a) != _diff_value(value_b):
+            changes.append((f.name, value_a, value_b))
+    return changes
+
+
+def diff_versions(version_a, version_b, opts):
+    """
+    Returns ``(field name, value a, value b)`` for the fields changed between
+    ``version_a`` and ``version_b``, with the values as stored in the versions.
+    """
+    key = VERSION_DIFF_KEY % (version_a.pk, version_b.pk)
+    changes = cache.get(key)
+    if changes is None:
+        changes = _diff_fields(version_a, version_b, opts)
+        cache.set(key, changes, VERSION_DIFF_TIMEOUT)
+    return changes
+
+
+def diff_timeline(versions, opts):
+    """
+    Returns ``(version, changes)`` for each of ``versions``, ``changes`` being
+    the fields changed from the previous version as ``diff_versions`` returns
+    them, and None for the first version.
+    """
+    versions = list(versions)
+    pairs = zip(versions, versions[1:])
+    keys = [VERSION_DIFF_KEY % (a.pk, b.pk) for a, b in pairs]
+    diffs = cache.get_many(keys)
+
+    missing = {}
+    for key, (version_a, version_b) in zip(keys, pairs):
+        if key not in diffs:
+            missing[key] = diffs[key] = _diff_fields(version_a, version_b, opts)
+    if missing:
+        cache.set_many(missing, VERSION_DIFF_TIMEOUT)
+
+    return [(version, diffs[keys[i - 1]] if i else None) for i, version in enumerate(versions)]
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def _start_of_day(date):
+    value = datetime.datetime.combine(date, datetime.time())
+    if settings.USE_TZ:
+        value = timezone.make_aware(value, timezone.get_current_timezone())
+    return value
+
 
 def _registe_model(admin, model):
     if not hasattr(admin, 'revision_manager'):
@@ -65,6 +232,7 @@ def _registe_model(admin, model):
                     accessor = inline_model._meta.get_field(fk_name).related.get_accessor_name()
                     inline_fields.append(accessor)
         _autoregister(admin, model, inline_fields)
+    _connect_batch_receivers(model)
 
 def registe_models(admin_site=None):
     if admin_site is None:
@@ -74,6 +242,512 @@ def registe_models(admin_site=None):
         if getattr(admin, 'reversion_enable', False):
             _registe_model(admin, model)
 
+class ChunkedRecoverer(object):
+    """
+    Recovers the deleted objects of a queryset of versions of ``model``,
+    ``batch_size`` versions in each transaction.
+
+    The objects followed by the registration of the model, like the inlines
+    registered by ``_registe_model``, are recovered from the same revision
+    when they are missing too: followed foreign keys and many to many before
+    the object, followed reverse relations after it.
+
+    ``revision`` is a ``BatchRevision``, entered around the whole recover and
+    flushed in the transaction of each batch, so the recovered objects get
+    their versions with their save.
+    """
+
+    def __init__(self, revision_manager, model, using=None, batch_size=100, revision=None):
+        self.revision_manager = revision_manager
+        self.model = model
+        self.using = using or DEFAULT_DB_ALIAS
+        self.batch_size = batch_size
+        self.revision = revision
+        self.recovered = 0
+        self.before, self.after = self.get_followed_models(model, set([model]))
+
+    def get_followed_models(self, model, seen):
+        """
+        Returns the registered models followed by ``model`` to recover before
+        and after it, with the models they follow in turn.
+        """
+        before, after = [], []
+        opts = model._meta
+        related = dict([(rel.get_accessor_name(), rel.model) for rel in
+            opts.get_all_related_objects() + opts.get_all_related_many_to_many_objects()])
+
+        for name in self.revision_manager.get_adapter(model).follow:
+            try:
+                rel_model, models = opts.get_field(name).rel.to, before
+            except FieldDoesNotExist:
+                if name not in related:
+                    continue
+                rel_model, models = related[name], after
+            if rel_model in seen or not self.revision_manager.is_registered(rel_model):
+                continue
+            seen.add(rel_model)
+            rel_before, rel_after = self.get_followed_models(rel_model, seen)
+            models.extend(rel_before + [rel_model] + rel_after)
+        return before, after
+
+    def recover(self, versions):
+        """
+        Recovers the objects of ``versions`` and returns how many were
+        recovered. The batches recovered before an error stay recovered, and
+        are counted in ``recovered``.
+        """
+        if self.revision is None:
+            return self.recover_batches(versions)
+        with self.revision:
+            return self.recover_batches(versions)
+
+    def recover_batches(self, versions):
+        # The versions to recover are searched once, not for each batch
+        pks = list(versions.order_by('pk').values_list('pk', flat=True))
+        for i in xrange(0, len(pks), self.batch_size):
+            batch = list(Version.objects.using(versions.db).filter(
+                pk__in=pks[i:i + self.batch_size]).order_by('pk'))
+            with transaction.commit_on_success(using=self.using):
+                self.recover_batch(batch)
+                if self.revision is not None:
+                    self.revision.flush()
+            self.recovered += len(batch)
+        return self.recovered
+
+    def recover_batch(self, versions):
+        followed = {}
+        if self.before or self.after:
+            content_types = dict([(ContentType.objects.get_for_model(model).pk, model)
+                for model in self.before + self.after])
+            for version in Version.objects.using(self.using).filter(
+                    revision__in=set([v.revision_id for v in versions]),
+                    content_type__in=content_types.keys()).exclude(type=VERSION_DELETE).order_by('pk'):
+                followed.setdefault(content_types[version.content_type_id], []).append(version)
+
+        for model in self.before:
+            self.save_missing(model, followed.get(model, []))
+        self.save_missing(self.model, versions)
+        for model in self.after:
+            self.save_missing(model, followed.get(model, []))
+
+    def save_missing(self, model, versions):
+        """
+        Saves the objects of ``versions`` missing from the database, each
+        from its latest version.
+        """
+        pk_field = model._meta.pk
+        latest = {}
+        for version in versions:
+            latest[pk_field.to_python(version.object_id)] = version
+        if not latest:
+            return
+        live = set(model._default_manager.using(self.using).filter(
+            pk__in=latest.keys()).values_list('pk', flat=True))
+        for pk, version in latest.items():
+            if pk not in live:
+                version.object_version.save(using=self.using)
+
+
+class _BatchRevisions(local):
+    """The batched revisions open in the current thread."""
+
+    def __init__(self):
+        self.stack = []
+
+_batch_revisions = _BatchRevisions()
+
+
+def _batch_post_save(sender, instance, created, **kwargs):
+    if _batch_revisions.stack:
+        _batch_revisions.stack[-1].add_saved(instance, created)
+
+
+def _batch_pre_delete(sender, instance, **kwargs):
+    if _batch_revisions.stack:
+        _batch_revisions.stack[-1].add_deleted(instance)
+
+
+def _batch_post_delete(sender, instance, **kwargs):
+    if _batch_revisions.stack:
+        _batch_revisions.stack[-1].confirm_deleted(instance)
+
+
+def _connect_batch_receivers(model):
+    """
+    Connects the receivers of the batched revisions to ``model``, once, when
+    it is registered. Connected to the registered models only, reversion
+    warns about any other receiver of the Revision and Version signals.
+    """
+    signals.post_save.connect(_batch_post_save, sender=model, dispatch_uid='exadmin_batch_revision')
+    signals.pre_delete.connect(_batch_pre_delete, sender=model, dispatch_uid='exadmin_batch_revision')
+    signals.post_delete.connect(_batch_post_delete, sender=model, dispatch_uid='exadmin_batch_revision')
+
+
+class BatchRevision(object):
+    """
+    A revision context like ``create_revision`` of reversion, for the saves
+    and deletes of many objects.
+
+    Reversion serializes and inserts the version of each object on its own.
+    Here the saved objects are serialized ``batch_size`` at a time and their
+    versions are inserted with ``bulk_create`` when the context exits without
+    an error. Deleted objects are serialized before they are deleted, like
+    reversion does, as they are gone afterwards, and are part of the revision
+    once their delete is done. Only the models registered by the admin, with
+    ``reversion_enable`` or as its inlines, are collected.
+
+    With ``summary_fields``, changed objects only get a ``RevisionDelta``
+    holding the values of those fields, in place of a full version, and the
+    relations registered to follow are not followed. Added and deleted
+    objects still get full versions, so they can be recovered.
+    """
+    # Rows per insert, low enough for the parameters limit of sqlite
+    insert_batch_size = 100
+
+    def __init__(self, revision_manager, user=None, comment='', db=None, batch_size=500, summary_fields=None):
+        self.revision_manager = revision_manager
+        self.user = user
+        self.comment = comment
+        self.db = db or DEFAULT_DB_ALIAS
+        self.batch_size = batch_size
+        self.summary_fields = summary_fields
+        self.objects = SortedDict()
+        # version data of the objects being deleted, by key
+        self.deleting = {}
+
+    def __enter__(self):
+        reversion_internals.start_manual(self.revision_manager)
+        _batch_revisions.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _batch_revisions.stack.pop()
+        try:
+            if exc_type is None:
+                self.save()
+        finally:
+            reversion_internals.end(self.revision_manager)
+
+    def __call__(self, func):
+        def do_revision(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+        return do_revision
+
+    def add_saved(self, instance, created):
+        # keyed by pk, deleted objects lose theirs
+        key = (instance.__class__, instance.pk)
+        if self.revision_manager.is_registered(instance.__class__):
+            if created:
+                flag = VERSION_ADD
+            elif key in self.objects:
+                flag = self.objects[key][1]
+            else:
+                flag = VERSION_CHANGE
+            self.objects[key] = (instance, flag)
+
+    def add_deleted(self, instance):
+        if self.revision_manager.is_registered(instance.__class__):
+            adapter = self.revision_manager.get_adapter(instance.__class__)
+            self.deleting[(instance.__class__, instance.pk)] = \
+                adapter.get_version_data(instance, VERSION_DELETE, self.db)
+
+    def confirm_deleted(self, instance):
+        key = (instance.__class__, instance.pk)
+        if key in self.deleting:
+            self.objects[key] = (instance, self.deleting.pop(key))
+
+    def flush(self):
+        """
+        Saves the revision of the objects collected so far, and collects the
+        next ones in a new revision. Used by the chunked deletes, to write the
+        versions of each batch in its transaction.
+        """
+        revision = self.save()
+        self.objects = SortedDict()
+        return revision
+
+    def serialize(self, objs, fields):
+        return simplejson.loads(serializers.serialize('json', objs, fields=fields), object_pairs_hook=SortedDict)
+
+    def get_serialized_data(self, adapter, objs):
+        """
+        Returns the serialized data of each of ``objs``, as reversion stores
+        it. Json data is serialized for all the objects at once and split.
+        """
+        format = adapter.get_serialization_format()
+        fields = list(adapter.get_fields_to_serialize())
+        if format != 'json':
+            return [serializers.serialize(format, (obj,), fields=fields) for obj in objs]
+        return [simplejson.dumps([item]) for item in self.serialize(objs, fields)]
+
+    def get_object_data(self, obj):
+        content_type = ContentType.objects.db_manager(self.db).get_for_model(obj)
+        return {
+            "object_id": unicode(obj.pk),
+            "object_id_int": has_int_pk(obj.__class__) and int(obj.pk) or None,
+            "content_type": content_type,
+            "object_repr": unicode(obj),
+        }
+
+    def save(self):
+        """
+        Saves the revision of the collected objects and returns it, None when
+        there is nothing to save.
+        """
+        objects = self.objects
+        if not objects:
+            return None
+        if self.summary_fields is None:
+            for obj in reversion_internals.follow_relationships(self.revision_manager,
+                    [obj for obj, data in objects.values() if not isinstance(data, dict)]):
+                key = (obj.__class__, obj.pk)
+                if key not in objects:
+                    objects[key] = (obj, VERSION_CHANGE)
+
+        versions, deltas = [], []
+        by_model = SortedDict()
+        for obj, data in objects.values():
+            if isinstance(data, dict):
+                versions.append(Version(**data))
+            else:
+                by_model.setdefault((obj.__class__, data), []).append(obj)
+
+        for (model, flag), objs in by_model.items():
+            adapter = self.revision_manager.get_adapter(model)
+            summary = self.summary_fields is not None and flag == VERSION_CHANGE
+            if summary:
+                fields = list(adapter.get_fields_to_serialize())
+                fields = [f for f in self.summary_fields if f in fields]
+            for i in xrange(0, len(objs), self.batch_size):
+                chunk = objs[i:i + self.batch_size]
+                if summary:
+                    for obj, item in zip(chunk, self.serialize(chunk, fields)):
+                        deltas.append(RevisionDelta(delta=simplejson.dumps(item['fields']),
+                            **self.get_object_data(obj)))
+                else:
+                    for obj, data in zip(chunk, self.get_serialized_data(adapter, chunk)):
+                        versions.append(Version(format=adapter.get_serialization_format(),
+                            serialized_data=data, type=flag, **self.get_object_data(obj)))
+
+        revision = Revision(manager_slug=reversion_internals.manager_slug(self.revision_manager),
+            user=self.user, comment=self.comment)
+        instances = [obj for obj, data in objects.values() if obj is not None]
+        pre_revision_commit.send(self.revision_manager, instances=instances, revision=revision, versions=versions)
+        revision.save(using=self.db)
+        for rows in (versions, deltas):
+            for row in rows:
+                row.revision = revision
+            for i in xrange(0, len(rows), self.insert_batch_size):
+                rows[0].__class__._default_manager.db_manager(self.db).bulk_create(rows[i:i + self.insert_batch_size])
+        post_revision_commit.send(self.revision_manager, instances=instances, revision=revision, versions=versions)
+        return revision
+
+
+class PlainRevision(object):
+    """
+    Reversion's own revision, with the interface of ``BatchRevision``, used
+    in its place when the installed reversion is not supported. Reversion
+    serializes each object on its own and writes the revision when the
+    context exits, so ``flush`` has nothing to write.
+    """
+
+    def __init__(self, context_manager, user=None, comment='', db=None, **kwargs):
+        self.context_manager = context_manager
+        self.user = user
+        self.comment = comment
+        self.db = db or DEFAULT_DB_ALIAS
+
+    def __enter__(self):
+        self.context_manager.start()
+        self.context_manager.set_user(self.user)
+        self.context_manager.set_comment(self.comment)
+        self.context_manager.set_db(self.db)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is not None:
+                self.context_manager.invalidate()
+        finally:
+            self.context_manager.end()
+
+    def __call__(self, func):
+        def do_revision(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+        return do_revision
+
+    def flush(self):
+        return None
+
+
+class OutboxRevision(BatchRevision):
+    """
+    A ``BatchRevision`` written after the request. The request only saves a
+    ``RevisionOutbox`` row, in its transaction, with the content type and pk
+    of the saved objects, and the serialized data of the deleted ones, which
+    are gone once the request is done. The row is written to the revision
+    tables by the outbox worker, which serializes the saved objects and the
+    relations they follow.
+
+    The versions of the saved objects hold them as they are when the worker
+    processes the row, not as the request left them: a change made in between
+    is in both revisions, and an object deleted in between gets no version in
+    the first one. That is the price of keeping serialization out of the
+    request.
+
+    The supported worker is the ``process_revision_outbox`` command, run with
+    ``--interval`` to keep processing the outbox. Setting
+    ``EXADMIN_REVISION_OUTBOX_THREAD`` starts a thread processing the outbox
+    after the requests instead, for the development server or a threaded
+    server running a single process.
+    """
+
+    def get_version_rows(self):
+        """
+        Returns the references of the saved objects and the version data of
+        the deleted ones, as json ready dictionaries.
+        """
+        saved, deleted = [], []
+        for obj, data in self.objects.values():
+            if isinstance(data, dict):
+                data = dict(data)
+                data['content_type_id'] = data.pop('content_type').pk
+                deleted.append(data)
+            else:
+                content_type = ContentType.objects.db_manager(self.db).get_for_model(obj)
+                saved.append({'content_type_id': content_type.pk, 'object_id': unicode(obj.pk), 'type': data})
+        return saved, deleted
+
+    def save(self):
+        if not self.objects:
+            return None
+        saved, deleted = self.get_version_rows()
+        entry = RevisionOutbox.objects.db_manager(self.db).create(
+            manager_slug=reversion_internals.manager_slug(self.revision_manager), user=self.user,
+            comment=force_unicode(self.comment), db=self.db,
+            saved=simplejson.dumps(saved), deleted=simplejson.dumps(deleted))
+        _pending_outbox.dbs.add(self.db)
+        return entry
+
+
+# Seconds after which an outbox row claimed by a worker that did not write it
+# can be claimed again
+OUTBOX_CLAIM_TIMEOUT = 60 * 10
+
+
+def write_outbox_entry(entry):
+    """
+    Writes the revision of the outbox row ``entry``, dated when the row was
+    saved. The saved objects are serialized as they are now, with the
+    relations they follow; the ones deleted since the row was saved are left
+    out.
+    """
+    db = entry.db
+    revision_manager = RevisionManager.get_manager(entry.manager_slug)
+    revision = BatchRevision(revision_manager, user=entry.user, comment=entry.comment, db=db)
+
+    refs = SortedDict()
+    for data in simplejson.loads(entry.saved):
+        model = ContentType.objects.db_manager(db).get_for_id(data['content_type_id']).model_class()
+        refs.setdefault(model, []).append((model._meta.pk.to_python(data['object_id']), data['type']))
+    for model, items in refs.items():
+        objs = model._default_manager.using(db).in_bulk([pk for pk, flag in items])
+        for pk, flag in items:
+            if pk in objs:
+                revision.objects[(model, pk)] = (objs[pk], flag)
+
+    for data in simplejson.loads(entry.deleted):
+        model = ContentType.objects.db_manager(db).get_for_id(data['content_type_id']).model_class()
+        revision.objects[(model, model._meta.pk.to_python(data['object_id']))] = (None, data)
+
+    saved = revision.save()
+    if saved is not None:
+        Revision.objects.using(db).filter(pk=saved.pk).update(date_created=entry.date_created)
+    return saved
+
+
+def process_revision_outbox(db=None):
+    """
+    Writes the revisions waiting in the outbox of ``db`` and returns how many
+    rows were done. Each row is claimed first, so several workers can process
+    the same outbox.
+    """
+    outbox = RevisionOutbox.objects.using(db or DEFAULT_DB_ALIAS)
+    now = timezone.now()
+    claimable = Q(claimed_at=None) | Q(claimed_at__lt=now - datetime.timedelta(seconds=OUTBOX_CLAIM_TIMEOUT))
+
+    done = 0
+    for pk in list(outbox.filter(claimable).order_by('pk').values_list('pk', flat=True)):
+        if not outbox.filter(claimable, pk=pk).update(claimed_at=now):
+            continue
+        entry = outbox.select_related('user').get(pk=pk)
+        with transaction.commit_on_success(using=entry.db):
+            write_outbox_entry(entry)
+            entry.delete()
+        done += 1
+    return done
+
+
+class _PendingOutbox(local):
+    """The databases with outbox rows saved by the current request."""
+
+    def __init__(self):
+        self.dbs = set()
+
+_pending_outbox = _PendingOutbox()
+
+
+class OutboxWorker(object):
+    """
+    A thread processing the outbox of the databases it is notified of, when
+    ``EXADMIN_REVISION_OUTBOX_THREAD`` is set. Rows left behind, by a failure
+    or a stopped process, are done by its next run or by the
+    ``process_revision_outbox`` command.
+
+    The thread is started by the first request writing to the outbox, so a
+    server forking its workers after that has no thread in the forks, and a
+    daemon thread dies with its process, in the middle of a row maybe. Run
+    the command instead with these servers.
+    """
+
+    def __init__(self):
+        self.queue = Queue()
+        self.thread = None
+        self.lock = Lock()
+
+    def notify(self, db):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = Thread(target=self.run, name='exadmin-revision-outbox')
+                self.thread.daemon = True
+                self.thread.start()
+        self.queue.put(db)
+
+    def run(self):
+        while True:
+            db = self.queue.get()
+            try:
+                process_revision_outbox(db)
+            except Exception, e:
+                logging.error(e, exc_info=True)
+            finally:
+                connections[db].close()
+
+outbox_worker = OutboxWorker()
+
+
+def _notify_outbox_worker(sender, **kwargs):
+    # the transaction of the request is over, its outbox rows can be read
+    if getattr(settings, 'EXADMIN_REVISION_OUTBOX_THREAD', False):
+        for db in _pending_outbox.dbs:
+            outbox_worker.notify(db)
+    _pending_outbox.dbs.clear()
+
+request_finished.connect(_notify_outbox_worker)
+
+
 class ReversionPlugin(BaseAdminPlugin):
     
     # The revision manager instance used to manage revisions.
@@ -87,13 +761,16 @@ class ReversionPlugin(BaseAdminPlugin):
 
     reversion_enable = False
 
-    def init_request(self, *args, **kwargs):
-        return self.reversion_enable
+    # Write the revisions after the request, from the revision outbox. The
+    # outbox is processed by the process_revision_outbox command.
+    reversion_async = False
+
+    required_options = ('reversion_enable',)
 
     @property
     def revision_context_manager(self):
         """The revision context manager for this VersionAdmin."""
-        return self.revision_manager._revision_context_manager
+        return reversion_internals.context_manager(self.revision_manager)
 
     def get_revision_instances(self, obj):
         """Returns all the instances to be used in the object's revision."""
@@ -115,28 +792,44 @@ class ReversionPlugin(BaseAdminPlugin):
             db = self.revision_context_manager.get_db(),
         )
 
+    def get_revision_comment(self):
+        admin_view = self.admin_view
+        if isinstance(admin_view, CreateAdminView):
+            return _(u"Initial version.")
+        elif isinstance(admin_view, UpdateAdminView):
+            return _(u"Change version.")
+        elif isinstance(admin_view, RevisionView):
+            return _(u"Revert version.")
+        elif isinstance(admin_view, RecoverView):
+            return _(u"Rercover version.")
+        elif isinstance(admin_view, DeleteAdminView):
+            return _(u"Deleted %(verbose_name)s.") % {"verbose_name": self.opts.verbose_name}
+        return ''
+
     def do_post(self, __):
         def _method():
             self.revision_context_manager.set_user(self.user)
-            comment = ''
-            admin_view = self.admin_view
-            if isinstance(admin_view, CreateAdminView):
-                comment = _(u"Initial version.")
-            elif isinstance(admin_view, UpdateAdminView):
-                comment = _(u"Change version.")
-            elif isinstance(admin_view, RevisionView):
-                comment = _(u"Revert version.")
-            elif isinstance(admin_view, RecoverView):
-                comment = _(u"Rercover version.")
-            elif isinstance(admin_view, DeleteAdminView):
-                comment = _(u"Deleted %(verbose_name)s.") % {"verbose_name": self.opts.verbose_name}
-            self.revision_context_manager.set_comment(comment)
+            self.revision_context_manager.set_comment(self.get_revision_comment())
             return __()
         return _method
 
     def post(self, __, request, *args, **kwargs):
+        if getattr(self.admin_view, 'batch_save', False):
+            # many rows are saved at once
+            return reversion_internals.revision(BatchRevision, self.revision_manager, user=self.user,
+                comment=_(u"Change version."), db=self.revision_context_manager.get_db())(__)()
+        if self.reversion_async:
+            return reversion_internals.revision(OutboxRevision, self.revision_manager, user=self.user,
+                comment=self.get_revision_comment(), db=self.revision_context_manager.get_db())(__)()
         return self.revision_context_manager.create_revision(manage_manually=False)(self.do_post(__))()
 
+    # Delete view, the versions of each batch are written in its transaction
+    def get_deleter(self, deleter):
+        revision_class = self.reversion_async and OutboxRevision or BatchRevision
+        deleter.revision = reversion_internals.revision(revision_class, self.revision_manager, user=self.user,
+            comment=self.get_revision_comment(), db=self.revision_context_manager.get_db())
+        return deleter
+
     # def save_models(self, __):
     #     self.revision_context_manager.create_revision(manage_manually=True)(__)()
 
@@ -194,17 +887,47 @@ class BaseReversionView(ModelAdminView):
 class RecoverListView(BaseReversionView):
 
     recover_list_template = None
-    
+    recover_per_page = 50
+    recover_batch_size = 100
+
+    def get_deleted_queryset(self):
+        """
+        Returns the latest versions of the deleted objects, searched by the
+        search text of the request in their repr and serialized data.
+        """
+        deleted = self.revision_manager.get_deleted(self.model)
+        query = self.request.GET.get(RECOVER_SEARCH_VAR)
+        if query:
+            deleted = deleted.filter(Q(object_repr__icontains=query) | Q(serialized_data__icontains=query))
+        return deleted
+
     def get_context(self):
         context = super(RecoverListView, self).get_context()
         opts = self.opts
-        deleted = self._order_version_queryset(self.revision_manager.get_deleted(self.model))
+
+        deleted = self._order_version_queryset(self.get_deleted_queryset()) \
+            .select_related('revision').only('object_id', 'object_repr', 'revision__date_created')
+        cursor = self.request.GET.get(HISTORY_CURSOR_VAR)
+        if cursor and cursor.isdigit():
+            op = self.history_latest_first and 'lt' or 'gt'
+            deleted = deleted.filter(**{'pk__%s' % op: cursor})
+        deleted = list(deleted[:self.recover_per_page + 1])
+        next_page_url = None
+        if len(deleted) > self.recover_per_page:
+            deleted = deleted[:self.recover_per_page]
+            next_page_url = self.get_query_string({HISTORY_CURSOR_VAR: deleted[-1].pk})
+
         context.update({
             "opts": opts,
             "app_label": opts.app_label,
             "module_name": capfirst(opts.verbose_name),
             "title": _("Recover deleted %(name)s") % {"name": force_unicode(opts.verbose_name_plural)},
             "deleted": deleted,
+            "search_query": self.request.GET.get(RECOVER_SEARCH_VAR, ''),
+            "has_add_permission": self.has_add_permission(),
+            "prev_page_url": HISTORY_CURSOR_VAR in self.request.GET and \
+                self.get_query_string(remove=[HISTORY_CURSOR_VAR]),
+            "next_page_url": next_page_url,
             "changelist_url": self.model_admin_urlname("changelist"),
         })
         return context
@@ -216,27 +939,156 @@ class RecoverListView(BaseReversionView):
         return TemplateResponse(request, self.recover_list_template or self.get_template_list("recover_list.html"),
             context, current_app=self.admin_site.name)
 
+    @csrf_protect_m
+    def post(self, request, *args, **kwargs):
+        if not self.has_add_permission():
+            raise PermissionDenied
+
+        deleted = self.get_deleted_queryset()
+        if RECOVER_ALL_VAR not in request.POST:
+            selected = [pk for pk in request.POST.getlist(RECOVER_SELECTED_VAR) if pk.isdigit()]
+            if not selected:
+                self.message_user(_(u"Items must be selected in order to recover them."), 'warning')
+                return HttpResponseRedirect(request.get_full_path())
+            deleted = deleted.filter(pk__in=selected)
+
+        revision = reversion_internals.revision(BatchRevision, self.revision_manager, user=self.user,
+            comment=_(u"Recovered %(verbose_name)s.") % {"verbose_name": self.opts.verbose_name},
+            db=deleted.db)
+        recoverer = ChunkedRecoverer(self.revision_manager, self.model,
+            using=deleted.db, batch_size=self.recover_batch_size, revision=revision)
+        try:
+            recoverer.recover(deleted)
+        except (DatabaseError, DeserializationError), e:
+            self.message_user(_(u"Recovering stopped after %(count)d %(items)s: %(error)s") % {
+                "count": recoverer.recovered, "items": model_ngettext(self.opts, recoverer.recovered),
+                "error": force_unicode(e)}, 'error')
+        else:
+            self.message_user(_(u"Successfully recovered %(count)d %(items)s.") % {
+                "count": recoverer.recovered, "items": model_ngettext(self.opts, recoverer.recovered)}, 'success')
+        return HttpResponseRedirect(request.get_full_path())
+
 class RevisionListView(BaseReversionView):
 
     object_history_template = None
     revision_diff_template = None
+    history_per_page = 50
+    # Show the fields changed by each version of the page. Off by default,
+    # the diffs not in the cache load the serialized data of the page
+    history_changes = False
+
+    def get_version_queryset(self):
+        """
+        Returns the versions of the object shown by the history, filtered by
+        the user and date range asked for, loading only the listed columns.
+        """
+        versions = self.revision_manager.get_for_object_reference(self.model, self.obj.pk) \
+            .select_related("revision__user").only('object_id', 'revision__date_created', 'revision__comment',
+                'revision__user__username', 'revision__user__first_name', 'revision__user__last_name')
+
+        user_id = self.request.GET.get(HISTORY_USER_VAR)
+        if user_id and user_id.isdigit():
+            versions = versions.filter(revision__user=user_id)
+        date_from = _parse_date(self.request.GET.get(HISTORY_FROM_VAR))
+        if date_from:
+            versions = versions.filter(revision__date_created__gte=_start_of_day(date_from))
+        date_to = _parse_date(self.request.GET.get(HISTORY_TO_VAR))
+        if date_to:
+            versions = versions.filter(revision__date_created__lt=_start_of_day(date_to + datetime.timedelta(days=1)))
+        return versions
+
+    def get_history_page(self, versions):
+        """
+        Returns the versions of the page asked for by the cursor of the
+        request, and the cursor of the next page, None on the last page.
+
+        The cursor is the date and pk of the last version of the previous page,
+        so a page is found by the index on revision dates, however deep it is.
+        """
+        desc = self.history_latest_first
+        op = desc and 'lt' or 'gt'
+        versions = versions.order_by(*(desc and ('-revision__date_created', '-pk') or ('revision__date_created', 'pk')))
+
+        cursor = self.request.GET.get(HISTORY_CURSOR_VAR)
+        if cursor and '_' in cursor:
+            date, pk = cursor.rsplit('_', 1)
+            try:
+                date, pk = parse_datetime(date), int(pk)
+            except ValueError:
+                date = None
+            if date:
+                versions = versions.filter(Q(**{'revision__date_created__%s' % op: date}) |
+                    Q(revision__date_created=date, **{'pk__%s' % op: pk}))
+
+        page = list(versions[:self.history_per_page + 1])
+        next_cursor = None
+        if len(page) > self.history_per_page:
+            page = page[:self.history_per_page]
+            next_cursor = '%s_%s' % (page[-1].revision.date_created.isoformat(), page[-1].pk)
+        return page, next_cursor
+
+    def get_history_changes(self, versions):
+        """
+        Returns the changes of each of ``versions``, from the version before
+        it, by version pk, as ``diff_timeline`` returns them. The serialized
+        data is loaded for the page and the version before it only, and only
+        when a diff is not in the cache.
+        """
+        if not versions:
+            return {}
+        versions = sorted(versions, key=lambda v: (v.revision.date_created, v.pk))
+        first = versions[0]
+        previous = self.revision_manager.get_for_object_reference(self.model, self.obj.pk) \
+            .filter(Q(revision__date_created__lt=first.revision.date_created) |
+                Q(revision__date_created=first.revision.date_created, pk__lt=first.pk)) \
+            .order_by('-revision__date_created', '-pk').values_list('pk', flat=True)[:1]
+        pks = list(previous) + [v.pk for v in versions]
+
+        keys = [VERSION_DIFF_KEY % pair for pair in zip(pks, pks[1:])]
+        diffs = cache.get_many(keys)
+        if len(diffs) < len(keys):
+            full = Version.objects.using(first._state.db).in_bulk(pks)
+            timeline = diff_timeline([full[pk] for pk in pks if pk in full], self.opts)
+            return dict([(version.pk, changes) for version, changes in timeline])
+        changes = dict(zip(pks[1:], [diffs[key] for key in keys]))
+        changes[pks[0]] = None
+        return changes
 
     def get_context(self):
         context = super(RevisionListView, self).get_context()
 
         opts = self.opts
+        versions, next_cursor = self.get_history_page(self.get_version_queryset())
+        revision_url = self.model_admin_urlname('revision', quote(self.obj.pk), HISTORY_URL_ID)
+        # The versions of a user are not consecutive, their diffs are not shown
+        history_changes = self.history_changes and not self.request.GET.get(HISTORY_USER_VAR)
+        changes = history_changes and self.get_history_changes(versions) or {}
+        labels = dict([(f.name, f.verbose_name) for f in (opts.fields + opts.many_to_many)])
         action_list = [
             {
                 "revision": version.revision,
-                "url": self.model_admin_urlname('revision', quote(version.object_id), version.id),
-                "version": version
+                "url": revision_url.replace(HISTORY_URL_ID, str(version.pk)),
+                "version": version,
+                "changes": [labels[name] for name, value_a, value_b in changes.get(version.pk) or []],
+                "initial": changes.get(version.pk) is None,
             }
-            for version
-            in self._order_version_queryset(self.revision_manager.get_for_object_reference(
-                self.model,
-                self.obj.pk,
-            ).select_related("revision__user"))
+            for version in versions
         ]
+
+        users = self.revision_manager.get_for_object_reference(self.model, self.obj.pk) \
+            .exclude(revision__user=None).order_by('revision__user__username') \
+            .values_list('revision__user', 'revision__user__username').distinct()
+
+        context.update({
+            'history_changes': history_changes,
+            'history_users': users,
+            'history_user': self.request.GET.get(HISTORY_USER_VAR, ''),
+            'history_from': self.request.GET.get(HISTORY_FROM_VAR, ''),
+            'history_to': self.request.GET.get(HISTORY_TO_VAR, ''),
+            'prev_page_url': HISTORY_CURSOR_VAR in self.request.GET and \
+                self.get_query_string(remove=[HISTORY_CURSOR_VAR]),
+            'next_page_url': next_cursor and self.get_query_string({HISTORY_CURSOR_VAR: next_cursor}),
+        })
         context.update({
             'title': _('Change history: %s') % force_unicode(self.obj),
             'action_list': action_list,
@@ -264,19 +1116,20 @@ class RevisionListView(BaseReversionView):
         return TemplateResponse(self.request, self.object_history_template or self.get_template_list('object_history.html'),
             context, current_app=self.admin_site.name)
 
-    def get_version_object(self, version):
-        obj_version = version.object_version
-        obj = obj_version.object
-        obj._state.db = self.obj._state.db
-
-        for field_name, pks in obj_version.m2m_data.items():
-            f = self.opts.get_field(field_name)
-            if f.rel and isinstance(f.rel, models.ManyToManyRel):
-                setattr(obj, f.name, f.rel.to._default_manager.get_query_set().filter(pk__in=pks).all())
-
-        detail = self.get_model_view(DetailAdminUtil, self.model, obj)
-
-        return obj, detail
+    def get_version_value(self, f, value):
+        """
+        Returns the display of ``value``, a value of field ``f`` as stored in a
+        version.
+        """
+        if f.rel and value is not None:
+            pks = isinstance(value, (list, tuple)) and value or [value]
+            objs = f.rel.to._default_manager.in_bulk(pks)
+            return ', '.join([smart_unicode(objs.get(pk, pk)) for pk in pks])
+        try:
+            value = f.to_python(value)
+        except ValidationError:
+            return smart_unicode(value)
+        return display_for_field(value, f)
 
     def post(self, request, object_id, *args, **kwargs):
         object_id = unquote(object_id)
@@ -300,32 +1153,12 @@ class RevisionListView(BaseReversionView):
         version_a = get_object_or_404(Version, pk=version_a_id)
         version_b = get_object_or_404(Version, pk=version_b_id)
 
+        fields = dict([(f.name, f) for f in (self.opts.fields + self.opts.many_to_many)])
         diffs = []
-
-        obj_a, detail_a = self.get_version_object(version_a)
-        obj_b, detail_b = self.get_version_object(version_b)
-
-        for f in (self.opts.fields + self.opts.many_to_many):
-            if isinstance(f, RelatedObject):
-                label = f.opts.verbose_name
-            else:
-                label = f.verbose_name
-
-            value_a = f.value_from_object(obj_a)
-            value_b = f.value_from_object(obj_b)
-            is_diff = value_a != value_b
-
-            if type(value_a) in (list, tuple) and type(value_b) in (list, tuple) \
-                and len(value_a) == len(value_b) and is_diff:
-                is_diff = False
-                for i in xrange(len(value_a)):
-                    if value_a[i] != value_a[i]:
-                        is_diff = True
-                        break;
-            if type(value_a) is QuerySet and type(value_b) is QuerySet:
-                is_diff = list(value_a) != list(value_b)
-
-            diffs.append((label, detail_a.get_field_result(f.name).val, detail_b.get_field_result(f.name).val, is_diff))
+        for name, value_a, value_b in diff_versions(version_a, version_b, self.opts):
+            f = fields[name]
+            diffs.append((f.verbose_name, self.get_version_value(f, value_a),
+                self.get_version_value(f, value_b), True))
 
         context = super(RevisionListView, self).get_context()
         context.update({
@@ -555,26 +1388,29 @@ class ActionRevisionPlugin(BaseAdminPlugin):
 
     revision_manager = default_revision_manager
     reversion_enable = False
+    # Objects serialized at once in the revision of an action
+    revision_batch_size = 500
 
-    def init_request(self, *args, **kwargs):
-        return self.reversion_enable
+    required_options = ('reversion_enable',)
 
     @property
     def revision_context_manager(self):
-        return self.revision_manager._revision_context_manager
-
-    def do_action_func(self, __):
-        def _method():
-            self.revision_context_manager.set_user(self.user)
-            action_view = self.admin_view
-            comment = action_view.description % model_format_dict(self.opts)
+        return reversion_internals.context_manager(self.revision_manager)
 
-            self.revision_context_manager.set_comment(comment)
-            return __()
-        return _method
+    def get_revision(self):
+        action_view = self.admin_view
+        return reversion_internals.revision(BatchRevision, self.revision_manager, user=self.user,
+            comment=action_view.description % model_format_dict(self.opts),
+            db=self.revision_context_manager.get_db(), batch_size=self.revision_batch_size,
+            summary_fields=getattr(action_view, 'revision_summary_fields', None))
 
     def do_action(self, __, queryset):
-        return self.revision_context_manager.create_revision(manage_manually=False)(self.do_action_func(__))()
+        return self.get_revision()(__)()
+
+    # Chunked deletes, the versions of each batch are written in its transaction
+    def get_deleter(self, deleter, queryset):
+        deleter.revision = self.get_revision()
+        return deleter
 
 site.register(Revision)
 site.register(Version)
@@ -1,13 +1,49 @@
 import sys
+import time
 from functools import update_wrapper
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-from django.core.urlresolvers import reverse
+from django.core.urlresolvers import reverse, RegexURLResolver, Resolver404
 from django.db.models.base import ModelBase
-from django.http import HttpResponseRedirect
-from django.views.decorators.cache import never_cache
+from django.http import HttpResponse, HttpResponseRedirect, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers, add_never_cache_headers
+from django.utils.hashcompat import md5_constructor
+from django.utils.translation import get_language, check_for_language
 from django.views.decorators.csrf import csrf_protect
+from exadmin.util import freeze
+
+# Path of the static i18n JavaScript catalogue of a language
+I18N_STATIC_PATH = 'exadmin/jsi18n/%s.js'
+I18N_PACKAGES = ['django.conf', 'exadmin']
+
+def render_i18n_catalog(language):
+    """
+    Renders the i18n JavaScript catalogue of the admin in ``language``.
+    """
+    from django.http import HttpRequest
+    from django.utils import translation
+    if settings.USE_I18N:
+        from django.views.i18n import javascript_catalog
+    else:
+        from django.views.i18n import null_javascript_catalog as javascript_catalog
+    with translation.override(language):
+        return javascript_catalog(HttpRequest(), packages=I18N_PACKAGES).content
+
+def never_cache(view_func):
+    """
+    Like Django's ``never_cache``, except for the responses with an etag set
+    by the view, which may be kept by the browser as long as it revalidates
+    them.
+    """
+    def _wrapped_view_func(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if response.has_header('ETag'):
+            patch_cache_control(response, private=True, no_cache=True, must_revalidate=True, max_age=0)
+        else:
+            add_never_cache_headers(response)
+        return response
+    return update_wrapper(_wrapped_view_func, view_func)
 
 reload(sys)
 sys.setdefaultencoding( "utf-8" )
@@ -22,6 +58,25 @@ class MergeAdminMetaclass(type):
     def __new__(cls, name, bases, attrs):
         return type.__new__(cls, name, bases, attrs)
 
+class ModelViewsResolver(RegexURLResolver):
+    """
+    Resolves the model views of the site. The ``app_label/module_name/`` part
+    of the path picks the patterns of the model in a dict, so only the view
+    patterns of that model are tried. Reversing works as with one include per
+    model.
+    """
+
+    def __init__(self, model_patterns):
+        super(ModelViewsResolver, self).__init__(r'^', [pattern for key, pattern in model_patterns])
+        self.model_patterns = dict(model_patterns)
+
+    def resolve(self, path):
+        parts = path.split('/', 2)
+        pattern = self.model_patterns.get(tuple(parts[:2])) if len(parts) == 3 else None
+        if pattern is None:
+            raise Resolver404({'path': path})
+        return pattern.resolve(path)
+
 class AdminSite(object):
 
     def __init__(self, name='admin', app_name='admin'):
@@ -33,11 +88,25 @@ class AdminSite(object):
         self._registry_views = [] # url instance contains (path, admin_view class, name)
         self._registry_modelviews = [] # url instance contains (path, admin_view class, name)
         self._registry_plugins = {} # view_class class -> plugin_class class
+        self._plugin_modules = [] # dotted paths of the plugin modules
+        self._pending_plugin_modules = [] # plugin modules not imported yet
 
+        # merged classes, by the classes they are built from
         self._admin_view_cache = {}
+        self._plugin_class_cache = {}
+        self.warm_report = None
+        self._i18n_catalogs = {} # language -> (i18n JavaScript catalogue, etag)
 
         self.check_dependencies()
 
+    def clear_cache(self):
+        """
+        Drops the merged view and plugin classes, built again from the
+        registry when next used.
+        """
+        self._admin_view_cache.clear()
+        self._plugin_class_cache.clear()
+
     def copy_registry(self):
         import copy
         return {
@@ -54,26 +123,58 @@ class AdminSite(object):
         self._registry_views = data['views']
         self._registry_modelviews = data['modelviews']
         self._registry_plugins = data['plugins']
+        self.clear_cache()
 
     def register_modelview(self, path, admin_view_class, name):
         from exadmin.views.base import BaseAdminView
         if issubclass(admin_view_class, BaseAdminView):
             self._registry_modelviews.append((path, admin_view_class, name))
+            self.clear_cache()
         else:
             raise ImproperlyConfigured(u'The registered view class %s isn\'t subclass of %s' % \
                 (admin_view_class.__name__, BaseAdminView.__name__))
 
     def register_view(self, path, admin_view_class, name):
         self._registry_views.append((path, admin_view_class, name))
+        self.clear_cache()
 
     def register_plugin(self, plugin_class, admin_view_class):
         from exadmin.views.base import BaseAdminPlugin
         if issubclass(plugin_class, BaseAdminPlugin):
             self._registry_plugins.setdefault(admin_view_class, []).append(plugin_class)
+            self.clear_cache()
         else:
             raise ImproperlyConfigured(u'The registered plugin class %s isn\'t subclass of %s' % \
                 (plugin_class.__name__, BaseAdminPlugin.__name__))
 
+    def register_plugin_module(self, module_path):
+        """
+        Registers a module of plugins by its dotted path. The module is only
+        imported when the admin views are first built, by ``load_plugins``.
+        """
+        if module_path not in self._plugin_modules:
+            self._plugin_modules.append(module_path)
+            self._pending_plugin_modules.append(module_path)
+            self.clear_cache()
+
+    def load_plugins(self):
+        """
+        Imports the registered plugin modules not imported yet. The plugins of
+        these modules are kept in the order of the modules, whatever order
+        they were imported in.
+        """
+        if not self._pending_plugin_modules:
+            return
+        from django.utils.importlib import import_module
+        while self._pending_plugin_modules:
+            import_module(self._pending_plugin_modules.pop(0))
+
+        order = dict([(path, i) for i, path in enumerate(self._plugin_modules)])
+        for view_class, plugins in self._registry_plugins.items():
+            ordered = iter(sorted([p for p in plugins if p.__module__ in order], key=lambda p: order[p.__module__]))
+            self._registry_plugins[view_class] = [ordered.next() if p.__module__ in order else p for p in plugins]
+        self.clear_cache()
+
     def register(self, model_or_iterable, admin_class=object, **options):
         from exadmin.views.base import BaseAdminView
         if isinstance(model_or_iterable, ModelBase) or issubclass(model_or_iterable, BaseAdminView):
@@ -108,7 +209,7 @@ class AdminSite(object):
 
                 # Instantiate the admin class to save in the registry
                 self._registry_avs[model] = admin_class
-
+        self.clear_cache()
 
     def unregister(self, model_or_iterable):
         """
@@ -128,6 +229,7 @@ class AdminSite(object):
                 if model not in self._registry_avs:
                     raise NotRegistered('The admin_view_class %s is not registered' % model.__name__)
                 del self._registry_avs[model]
+        self.clear_cache()
 
     def has_permission(self, request):
         """
@@ -199,6 +301,12 @@ class AdminSite(object):
 
     def create_plugin(self, option_classes):
         def merge_class(plugin_class):
+            key = (plugin_class, tuple(option_classes))
+            if key not in self._plugin_class_cache:
+                self._plugin_class_cache[key] = build_class(plugin_class)
+            return self._plugin_class_cache[key]
+
+        def build_class(plugin_class):
             if option_classes:
                 attrs = {}
                 bases = [plugin_class]
@@ -216,6 +324,7 @@ class AdminSite(object):
 
     def get_plugins(self, admin_view_class, *option_classes):
         from exadmin.views import BaseAdminView
+        self.load_plugins()
         plugins = []
         opts = [oc for oc in option_classes if oc]
         for klass in admin_view_class.mro():
@@ -223,10 +332,22 @@ class AdminSite(object):
                 reg_class = self._registry_avs.get(klass)
                 merge_opts = opts if reg_class is None else [reg_class] + opts
                 ps = self._registry_plugins.get(klass, [])
-                plugins.extend(map(self.create_plugin(merge_opts), ps) if merge_opts else ps)
+                ps = map(self.create_plugin(merge_opts), ps) if merge_opts else ps
+                plugins.extend([p for p in ps if p.is_active()])
         return plugins
 
     def get_view_class(self, view_class, admin_class=None, **opts):
+        key = (view_class, admin_class, freeze(opts))
+        try:
+            view = self._admin_view_cache.get(key)
+        except TypeError:
+            # Unhashable options, build the class every time.
+            return self.build_view_class(view_class, admin_class, **opts)
+        if view is None:
+            view = self._admin_view_cache[key] = self.build_view_class(view_class, admin_class, **opts)
+        return view
+
+    def build_view_class(self, view_class, admin_class=None, **opts):
         admin_classes = [admin_class]
         for klass in view_class.mro():
             reg_class = self._registry_avs.get(klass)
@@ -236,12 +357,40 @@ class AdminSite(object):
         merges = filter(lambda x:x, admin_classes)
         new_class_name = ''.join([c.__name__ for c in merges])
 
-        if not self._admin_view_cache.has_key(new_class_name):
-            plugins = self.get_plugins(view_class, admin_class)
-            self._admin_view_cache[new_class_name] = MergeAdminMetaclass(new_class_name, tuple(merges), \
-                dict({'plugin_classes': plugins, 'admin_site': self}, **opts))
+        plugins = self.get_plugins(view_class, admin_class)
+        return MergeAdminMetaclass(new_class_name, tuple(merges), \
+            dict({'plugin_classes': plugins, 'admin_site': self}, **opts))
 
-        return self._admin_view_cache[new_class_name]
+    def warm_registry(self):
+        """
+        Builds the merged view and plugin classes of the site views, and of
+        the views and inlines of every registered model, so requests find them
+        built. The time spent is kept in ``warm_report``, one
+        ``(name, seconds, classes built)`` for the site views and for each
+        model, and returned.
+        """
+        from exadmin.views.base import BaseAdminView
+        from exadmin.plugins.inline import InlineModelAdmin
+        self.load_plugins()
+
+        def build(views):
+            start = time.time()
+            for view_class, admin_class in views:
+                self.get_view_class(view_class, admin_class)
+            return time.time() - start, len(views)
+
+        report = []
+        views = [(clz, None) for path, clz, name in self._registry_views \
+            if type(clz) == type and issubclass(clz, BaseAdminView)]
+        report.append(('site',) + build(views))
+
+        for model, admin_class in self._registry.items():
+            views = [(clz, admin_class) for path, clz, name in self._registry_modelviews]
+            views.extend([(InlineModelAdmin, inline_class) for inline_class in getattr(admin_class, 'inlines', [])])
+            report.append(('%s.%s' % (model._meta.app_label, model._meta.module_name),) + build(views))
+
+        self.warm_report = report
+        return report
 
     def create_admin_view(self, admin_view_class):
         return self.get_view_class(admin_view_class).as_view()
@@ -252,10 +401,14 @@ class AdminSite(object):
     def get_urls(self):
         from django.conf.urls import patterns, url, include
         from exadmin.views.base import BaseAdminView
+        from exadmin.util import clear_reverse_cache
 
         if settings.DEBUG:
             self.check_dependencies()
 
+        # plugin modules may register views too
+        self.load_plugins()
+
         def wrap(view, cacheable=False):
             def wrapper(*args, **kwargs):
                 return self.admin_view(view, cacheable)(*args, **kwargs)
@@ -273,21 +426,52 @@ class AdminSite(object):
         )
 
         # Add in each model's views.
+        model_patterns = []
         for model, admin_class in self._registry.iteritems():
             view_urls = [url(path, wrap(self.create_model_admin_view(clz, model, admin_class)), \
                 name=name % (model._meta.app_label, model._meta.module_name)) \
                 for path, clz, name in self._registry_modelviews]
-            urlpatterns += patterns('',
+            model_patterns.append(((model._meta.app_label, model._meta.module_name),
                 url(r'^%s/%s/' % (model._meta.app_label, model._meta.module_name),
-                    include(patterns('', *view_urls)))
-            )
-            
+                    include(patterns('', *view_urls)))))
+        urlpatterns.append(ModelViewsResolver(model_patterns))
+
+        clear_reverse_cache()
         return urlpatterns
 
     @property
     def urls(self):
         return self.get_urls(), self.app_name, self.name
 
+    def get_i18n_catalog(self, language):
+        """
+        Returns the i18n JavaScript catalogue of ``language`` with its etag.
+        The catalogues only change with a deploy, so each one is rendered once
+        and kept in memory.
+        """
+        if language not in self._i18n_catalogs:
+            content = render_i18n_catalog(language)
+            self._i18n_catalogs[language] = (content, md5_constructor(content).hexdigest())
+        return self._i18n_catalogs[language]
+
+    def get_i18n_javascript_url(self, language=None):
+        """
+        Returns the url of the i18n JavaScript catalogue, the static file when
+        the ``EXADMIN_STATIC_JSI18N`` setting is set. Otherwise the url of the
+        jsi18n view, versioned by the etag of the catalogue so it can be
+        cached for good.
+        """
+        from exadmin.util import static, cached_reverse
+        language = language or get_language()
+        if getattr(settings, 'EXADMIN_STATIC_JSI18N', False):
+            # the files are named after the LANGUAGES setting, en for en-us
+            languages = dict(settings.LANGUAGES)
+            if language not in languages and language.split('-')[0] in languages:
+                language = language.split('-')[0]
+            return static(I18N_STATIC_PATH % language)
+        content, etag = self.get_i18n_catalog(language)
+        return '%s?v=%s' % (cached_reverse('%s:jsi18n' % self.app_name, current_app=self.name), etag[:12])
+
     def i18n_javascript(self, request):
         """
         Displays the i18n JavaScript that the Django admin requires.
@@ -295,11 +479,24 @@ class AdminSite(object):
         This takes into account the USE_I18N setting. If it's set to False, the
         generated JavaScript will be leaner and faster.
         """
-        if settings.USE_I18N:
-            from django.views.i18n import javascript_catalog
+        language = request.GET.get('language')
+        if not (language and check_for_language(language)):
+            language = get_language()
+        content, etag = self.get_i18n_catalog(language)
+        etag = '"%s"' % etag
+
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, 'text/javascript; charset=utf-8')
+        response['ETag'] = etag
+        if request.GET.get('v') == etag[1:13]:
+            # versioned url, the content never changes
+            patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365)
         else:
-            from django.views.i18n import null_javascript_catalog as javascript_catalog
-        return javascript_catalog(request, packages=['django.conf', 'exadmin'])
+            patch_cache_control(response, public=True, max_age=0)
+            patch_vary_headers(response, ('Accept-Language', 'Cookie'))
+        return response
 
 # This global object represents the default admin site, for the common case.
 # You can instantiate AdminSite in your own code to create a custom admin site.
@@ -0,0 +1,36 @@
+(function($){
+
+  // Poll the progress of a batched delete while the delete request runs.
+  $.fn.deleteProgress = function(){
+    return this.each(function(){
+      var $el = $(this);
+      var url = $el.data('progress-url');
+      var bar = $el.find('.bar');
+      var text = $el.find('.progress-text');
+
+      var poll = function(){
+        $.getJSON(url, function(data){
+          if(data.total){
+            var percent = Math.min(100, Math.round(data.deleted * 100 / data.total));
+            bar.css('width', percent + '%');
+            text.text(data.deleted + ' / ' + data.total + (data.model ? ' (' + data.model + ')' : ''));
+          }
+          if(!data.finished){
+            setTimeout(poll, 1000);
+          }
+        });
+      };
+
+      $el.closest('form').on('submit', function(){
+        $el.removeClass('hide');
+        $(this).find('input[type=submit]').attr('disabled', 'disabled');
+        setTimeout(poll, 1000);
+      });
+    });
+  };
+
+  $(function(){
+    $('.delete-progress').deleteProgress();
+  });
+
+})(jQuery);
@@ -24,8 +24,8 @@
                         return {results: data.objects, more: data.has_more};
                     }
                 },
-                formatResult: function(item){return item['__str__']},
-                formatSelection: function(item){return item['__str__']}
+                formatResult: function(item){return $('<div/>').text(item['__str__']).html()},
+                formatSelection: function(item){return $('<div/>').text(item['__str__']).html()}
             });
         })
       });
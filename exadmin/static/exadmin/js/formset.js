@@ -88,6 +88,56 @@
                 if (options.added) options.added(row, $$);
                 return false;
             });
+
+            // load the next page of existing rows after the loaded ones
+            $(document).on('click', '.formset-more[data-prefix="' + options.prefix + '"]', function() {
+                var link = $(this);
+                if (link.hasClass('disabled')) return false;
+                link.addClass('disabled');
+
+                $.get(link.attr('href'), function(html) {
+                    var content = $('<div/>').html(html),
+                        rows = content.find('.formset-content .formset-row'),
+                        current = $$.find('.formset-row'),
+                        initialInput = $('#id_' + options.prefix + '-INITIAL_FORMS'),
+                        totalInput = $('#id_' + options.prefix + '-TOTAL_FORMS'),
+                        initial = initialInput.length ? parseInt(initialInput.val()) : current.length,
+                        count = rows.length;
+
+                    // new rows are numbered before the added ones
+                    for (var i = current.length - 1; i >= initial; i--) {
+                        updateRowIndex(current.eq(i), i + count);
+                    }
+                    rows.each(function(i) {
+                        updateRowIndex($(this), initial + i);
+                    });
+
+                    if (initial > 0) {
+                        current.eq(initial - 1).after(rows);
+                    } else {
+                        $$.prepend(rows);
+                    }
+                    rows.each(function(i) {
+                        var row = $(this);
+                        insertDeleteLink(row);
+                        row.exform();
+                        if (options.loaded) options.loaded(row, i, content, $$);
+                    });
+
+                    if (initialInput.length) {
+                        initialInput.val(initial + count);
+                        totalInput.val(parseInt(totalInput.val()) + count);
+                    }
+
+                    var more = content.find('.formset-more');
+                    if (more.length) {
+                        link.replaceWith(more);
+                    } else {
+                        link.remove();
+                    }
+                });
+                return false;
+            });
         }
 
         return $$;
@@ -108,6 +158,17 @@
                     })
                 }
             },
+            loaded: function(row, index, content, $$){
+                var tab = content.find('.nav-tabs li').eq(index).removeClass('active'),
+                    prev = $$.parent().find('.nav-tabs a[href=#' + row.prev().attr('id') + ']').parent();
+                row.removeClass('active');
+                tab.find('a').attr('href', '#' + row.attr('id'));
+                if (prev.length) {
+                    prev.after(tab);
+                } else {
+                    $$.parent().find('.nav-tabs').prepend(tab);
+                }
+            },
             removed: function(row, del, $$){
                 var rowId = row.attr('id');
                 if(rowId){
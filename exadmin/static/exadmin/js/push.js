@@ -0,0 +1,37 @@
+jQuery(function($){
+  // Reloads the model widgets of the dashboard when the push view tells
+  // their models changed.
+  var dashboard = $('.dashboard[data-push]');
+  if(!dashboard.length || !window.EventSource){
+    return;
+  }
+  var widgets = $.parseJSON(dashboard.attr('data-push-widgets'));
+  var changed = {}, timer;
+
+  var reload = function(){
+    var ids = changed;
+    changed = {};
+    $.ajax({
+      url: window.location.href.split('#')[0],
+      dataType: 'html',
+      success: function(html){
+        var page = $('<div></div>').append($.parseHTML(html));
+        $.each(ids, function(id){
+          var box = page.find('[id="' + id + '"] > .box-content');
+          if(box.length){
+            dashboard.find('[id="' + id + '"] > .box-content').replaceWith(box);
+          }
+        });
+      }
+    });
+  };
+
+  var source = new EventSource(dashboard.attr('data-push'));
+  source.addEventListener('change', function(e){
+    var data = $.parseJSON(e.data);
+    $.each(widgets[data.model] || [], function(i, id){ changed[id] = true; });
+    // Waits a little, so a burst of changes makes one reload
+    clearTimeout(timer);
+    timer = setTimeout(reload, 1000);
+  });
+});
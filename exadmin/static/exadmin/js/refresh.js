@@ -1,22 +1,108 @@
+
 (function($) {
 
+  // While the push stream is open the list is still polled, this many times
+  // slower, for the changes the stream does not carry
+  $.push_poll_factor = 10;
+  $.refresh_timer = null;
+
+  $.refresh_countdown = function(refresh_el){
+    var time = parseInt(refresh_el.attr('data-time'));
+    refresh_el.text($.refresh_push ? time * $.push_poll_factor : time);
+    clearTimeout($.refresh_timer);
+    $.refresh_timer = setTimeout("$.dofresh()",1000);
+  };
+
   $.dofresh = function(){
     var refresh_el = $('#refresh_time');
     var time = parseInt(refresh_el.text());
-    if(time == 1){
+    if(time <= 1){
       refresh_el.text(0);
-      window.location.reload();
+      $.dorefresh(refresh_el);
     } else {
       refresh_el.text(time-1);
-      setTimeout("$.dofresh()",1000)
+      $.refresh_timer = setTimeout("$.dofresh()",1000)
+    }
+  };
+
+  $.dorefresh = function(refresh_el){
+    if(refresh_el.attr('data-cursor') !== undefined){
+      $.dodelta(refresh_el);
+    } else {
+      window.location.reload();
     }
   };
 
+  // Asks only for the rows changed since the cursor, and patches them in.
+  $.dodelta = function(refresh_el){
+    var url = window.location.href.split('#')[0];
+    url += (url.indexOf('?') == -1 ? '?' : '&') + '_delta=' + encodeURIComponent(refresh_el.attr('data-cursor'));
+
+    $.ajax({
+      url: url,
+      dataType: 'json',
+      success: function(data){
+        var tbody = $('.results table tbody');
+        if(data.reload || !tbody.length){
+          window.location.reload();
+          return;
+        }
+        var trs = tbody.children('tr');
+        trs.filter('.info').removeClass('info');
+        // Reversed, so new rows keep the order of the list once added on top
+        $.each(data.rows.reverse(), function(i, row){
+          var tr = trs.filter(function(){ return $(this).attr('data-pk') == row.pk; });
+          if(!tr.length){
+            tr = $('<tr></tr>').attr('data-pk', row.pk).prependTo(tbody);
+          } else if(tr.data('html') == row.html){
+            // Sent again, unchanged
+            return;
+          }
+          tr.html(row.html).data('html', row.html).addClass('info');
+        });
+        refresh_el.attr('data-cursor', data.cursor);
+        $.refresh_countdown(refresh_el);
+      },
+      error: function(){
+        window.location.reload();
+      }
+    });
+  };
+
+  // Refreshes on the changes sent by the push view, when the browser can.
+  // The stream reconnects by itself after each push timeout; only a closed
+  // stream brings the polling back to the chosen pace.
+  $.dopush = function(refresh_el){
+    var timer;
+    var source = new EventSource(refresh_el.attr('data-push'));
+    source.onopen = function(){
+      if(!$.refresh_push){
+        $.refresh_push = true;
+        $.refresh_countdown(refresh_el);
+      }
+    };
+    source.addEventListener('change', function(){
+      // Waits a little, so a burst of changes makes one refresh
+      clearTimeout(timer);
+      timer = setTimeout(function(){ $.dorefresh(refresh_el); }, 1000);
+    });
+    source.onerror = function(){
+      if(source.readyState == EventSource.CLOSED && $.refresh_push){
+        $.refresh_push = false;
+        $.refresh_countdown(refresh_el);
+      }
+    };
+  };
+
   $(function(){
     var refresh_el = $('#refresh_time');
-    if(refresh_el){
-      setTimeout("$.dofresh()",1000)
+    if(!refresh_el.length){
+      return;
+    }
+    if(refresh_el.attr('data-push') && window.EventSource){
+      $.dopush(refresh_el);
     }
+    $.refresh_countdown(refresh_el);
   });
 
-})(jQuery);
\ No newline at end of file
+})(jQuery);
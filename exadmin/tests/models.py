@@ -0,0 +1,9 @@
+from django.db import models
+
+
+class Book(models.Model):
+    title = models.CharField(max_length=100)
+    changed = models.DateTimeField()
+
+    def __unicode__(self):
+        return self.title
@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+
+import os, sys
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'test_settings'
+parent = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+
+sys.path.insert(0, parent)
+
+from django.test.simple import DjangoTestSuiteRunner
+
+
+def runtests():
+    DjangoTestSuiteRunner(failfast=False).run_tests([
+        'tests',
+    ], verbosity=1, interactive=True)
+
+if __name__ == '__main__':
+    runtests()
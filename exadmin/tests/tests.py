@@ -0,0 +1,135 @@
+import datetime
+import re
+import threading
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import simplejson
+
+from exadmin.channels import LocalChannel, CacheChannel
+
+from models import Book
+
+
+class AdminTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.login(username='admin', password='admin')
+        self.now = datetime.datetime(2013, 1, 1, 12, 0, 0)
+        self.books = [Book.objects.create(title='book %d' % i, changed=self.now + datetime.timedelta(minutes=i))
+            for i in range(3)]
+
+
+class TestConditionalGet(AdminTestCase):
+
+    def test_unchanged_list(self):
+        response = self.client.get('/tests/book/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get('/tests/book/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, '')
+
+    def test_list_after_save(self):
+        etag = self.client.get('/tests/book/')['ETag']
+        book = self.books[0]
+        book.title = 'changed'
+        book.save()
+
+        response = self.client.get('/tests/book/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'changed')
+
+
+class TestRefreshDelta(AdminTestCase):
+
+    def get_cursor(self):
+        response = self.client.get('/tests/book/?_refresh=3')
+        self.assertEqual(response.status_code, 200)
+        return re.search(r'data-cursor="([^"]*)"', response.content).group(1)
+
+    def get_delta(self, cursor):
+        response = self.client.get('/tests/book/', {'_refresh': 3, '_delta': cursor},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        return simplejson.loads(response.content)
+
+    def test_changed_rows(self):
+        cursor = self.get_cursor()
+        book = self.books[0]
+        book.changed = self.now + datetime.timedelta(hours=1)
+        book.save()
+
+        data = self.get_delta(cursor)
+        self.assertFalse(data['reload'])
+        # the row at the cursor is sent again, the unchanged ones are not
+        self.assertEqual(sorted([row['pk'] for row in data['rows']]),
+            sorted([unicode(self.books[0].pk), unicode(self.books[2].pk)]))
+        self.assertEqual(data['cursor'], book.changed.isoformat())
+
+    def test_invalid_cursor(self):
+        self.assertTrue(self.get_delta('not a date')['reload'])
+
+
+class ChannelTests(object):
+
+    def get_channel(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        cache.clear()
+        self.channel = self.get_channel()
+
+    def test_publish_wait(self):
+        last_id = self.channel.last_id()
+        self.channel.publish('tests.book', {'pks': ['1']})
+        self.channel.publish('auth.user', {'pks': ['2']})
+
+        events, next_id = self.channel.wait(['tests.book'], last_id, 0)
+        self.assertEqual(events, [(last_id + 1, 'tests.book', {'pks': ['1']})])
+        self.assertEqual(next_id, last_id + 2)
+
+    def test_wait_other_keys(self):
+        last_id = self.channel.last_id()
+        self.channel.publish('auth.user', {'pks': ['2']})
+
+        events, next_id = self.channel.wait(['tests.book'], last_id, 0)
+        self.assertEqual(events, [])
+        self.assertEqual(next_id, last_id + 1)
+
+    def test_wait_for_publish(self):
+        last_id = self.channel.last_id()
+        timer = threading.Timer(0.1, self.channel.publish, ('tests.book', {'pks': None}))
+        timer.start()
+        try:
+            events, next_id = self.channel.wait(['tests.book'], last_id, 5)
+        finally:
+            timer.join()
+        self.assertEqual(events, [(last_id + 1, 'tests.book', {'pks': None})])
+
+
+class TestLocalChannel(ChannelTests, TestCase):
+
+    def get_channel(self):
+        return LocalChannel()
+
+
+class TestCacheChannel(ChannelTests, TestCase):
+
+    def get_channel(self):
+        channel = CacheChannel()
+        channel.poll_interval = 0.05
+        return channel
+
+
+class TestPushView(AdminTestCase):
+
+    def test_no_models(self):
+        self.assertEqual(self.client.get('/push/').status_code, 403)
+        self.assertEqual(self.client.get('/push/', {'models': 'auth.nothing'}).status_code, 403)
@@ -0,0 +1,8 @@
+from django.conf.urls import patterns, include, url
+
+import exadmin
+exadmin.autodiscover()
+
+urlpatterns = patterns('',
+    url(r'', include(exadmin.site.urls)),
+)
@@ -0,0 +1,13 @@
+import exadmin
+
+from models import Book
+
+
+class BookAdmin(object):
+    list_display = ('title', 'changed')
+    conditional_get = True
+    refresh_times = (3,)
+    refresh_delta_field = 'changed'
+    refresh_delta_lookback = 0
+
+exadmin.site.register(Book, BookAdmin)
@@ -1,3 +1,5 @@
+import operator
+
 from django.db import models
 from django.db.models.sql.constants import LOOKUP_SEP
 from django.db.models.deletion import Collector
@@ -10,14 +12,26 @@ from django.utils.text import capfirst
 from django.utils import timezone
 from django.utils.encoding import force_unicode, smart_unicode, smart_str
 from django.utils.translation import ungettext
-from django.core.urlresolvers import reverse
+from django.core.urlresolvers import reverse, get_urlconf, get_script_prefix
 from django.conf import settings
+from django.utils.datastructures import SortedDict
 
 if 'django.contrib.staticfiles' in settings.INSTALLED_APPS:
     from django.contrib.staticfiles.templatetags.staticfiles import static
 else:
     from django.templatetags.static import static
 
+def freeze(value):
+    """
+    Returns ``value`` with its lists and dicts turned into tuples, nested
+    ones too, so it can be part of a cache key.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple([freeze(v) for v in value])
+    elif isinstance(value, dict):
+        return tuple(sorted([(k, freeze(v)) for k, v in value.items()]))
+    return value
+
 def lookup_needs_distinct(opts, lookup_path):
     """
     Returns True if 'distinct()' should be used to query the given lookup path.
@@ -110,22 +124,35 @@ def get_deleted_objects(objs, opts, user, admin_site, using):
     """
     collector = NestedObjects(using=using)
     collector.collect(objs)
-    perms_needed = set()
+
+    format_callback = deleted_object_formatter(admin_site)
+    perms_needed = deleted_perms_needed(collector.data.keys(), user, admin_site)
+
+    to_delete = collector.nested(format_callback)
+
+    protected = [format_callback(obj) for obj in collector.protected]
+
+    return to_delete, perms_needed, protected
+
+
+def deleted_object_formatter(admin_site):
+    """
+    Returns the callback used to display an object of the delete confirmation
+    pages. The admin lookups are only done once per model.
+    """
+    has_admin_cache = {}
 
     def format_callback(obj):
-        has_admin = obj.__class__ in admin_site._registry
         opts = obj._meta
+        if obj.__class__ not in has_admin_cache:
+            has_admin_cache[obj.__class__] = obj.__class__ in admin_site._registry
 
-        if has_admin:
+        if has_admin_cache[obj.__class__]:
             admin_url = reverse('%s:%s_%s_change'
                                 % (admin_site.name,
                                    opts.app_label,
                                    opts.object_name.lower()),
                                 None, (quote(obj._get_pk_val()),))
-            p = '%s.%s' % (opts.app_label,
-                           opts.get_delete_permission())
-            if not user.has_perm(p):
-                perms_needed.add(opts.verbose_name)
             # Display a link to the admin page.
             return mark_safe(u'<span class="label label-info">%s:</span> <a href="%s">%s</a>' %
                              (escape(capfirst(opts.verbose_name)),
@@ -136,11 +163,153 @@ def get_deleted_objects(objs, opts, user, admin_site, using):
             # admin or is edited inline.
             return u'%s: %s' % (capfirst(opts.verbose_name),
                                 force_unicode(obj))
+    return format_callback
 
-    to_delete = collector.nested(format_callback)
 
-    protected = [format_callback(obj) for obj in collector.protected]
+def deleted_perms_needed(models, user, admin_site):
+    """
+    Returns the verbose names of the ``models`` to delete ``user`` can't
+    delete. Permissions are checked once per model, not once per object.
+    """
+    perms_needed = set()
+    for model in models:
+        opts = model._meta
+        if model in admin_site._registry and \
+                not user.has_perm('%s.%s' % (opts.app_label, opts.get_delete_permission())):
+            perms_needed.add(opts.verbose_name)
+    return perms_needed
+
+
+def _deleted_relations(model, using):
+    """
+    Yields ``(related model, on_delete, lookup)`` for the relations of
+    ``model`` removing or protecting rows when its objects are deleted, like
+    the collector follows them. ``lookup`` returns the filter of the related
+    rows of a queryset of ``model``.
+    """
+    for related in model._meta.get_all_related_objects(include_hidden=True):
+        field = related.field
+        on_delete = field.rel.on_delete
+        if on_delete not in (models.CASCADE, models.PROTECT):
+            # SET_NULL, SET_DEFAULT, DO_NOTHING ... do not remove rows.
+            continue
+        target = field.rel.get_related_field().attname
+        yield related.model, on_delete, lambda queryset, name=field.name, target=target: \
+            models.Q(**{'%s__in' % name: queryset.values(target).order_by()})
+
+    # Generic relations, the many to many fields without a through model
+    for field in model._meta.many_to_many:
+        if not field.rel.through:
+            from django.contrib.contenttypes.models import ContentType
+            content_type = ContentType.objects.db_manager(using).get_for_model(model)
+            yield field.rel.to, models.CASCADE, lambda queryset, field=field, content_type=content_type: \
+                models.Q(**{field.content_type_field_name: content_type,
+                    '%s__in' % field.object_id_field_name: queryset.values('pk').order_by()})
+
+
+def get_deleted_models(model, using):
+    """
+    Returns the models whose rows deleting objects of ``model`` may remove,
+    from the relations alone, without counting the rows.
+    """
+    found = [model]
+    for deleted_model in found:
+        for rel_model, on_delete, lookup in _deleted_relations(deleted_model, using):
+            if on_delete == models.CASCADE and rel_model not in found:
+                found.append(rel_model)
+    return found
+
+
+def count_deleted_objects(queryset, using, deleted_querysets=None):
+    """
+    Counts the rows deleting ``queryset`` would remove, and the rows
+    protecting them, per model. No object is loaded: the rows of each model
+    are a filter over subqueries of the models cascading to it, and are
+    counted once, however many relations reach them.
+
+    Models are counted in an order where the models cascading to a model come
+    first, and the models only reached through models with no row are not
+    counted. Relation cycles, like self referencing trees, are followed for
+    one level.
+
+    Returns two ``SortedDict`` of counts by model, of the deleted and of the
+    protected rows, without the models with no row. When
+    ``deleted_querysets`` is a dict, it gets the querysets of the deleted
+    rows of the counted models.
+    """
+    root = queryset.model
+    incoming = {}   # model: [lookup]
+    cycles = []     # [(model, parent, lookup)]
+    protecting = SortedDict()
+    order = []
+    visiting, visited = set(), set()
+
+    def visit(model):
+        visiting.add(model)
+        for rel_model, on_delete, lookup in _deleted_relations(model, using):
+            if on_delete == models.PROTECT:
+                protecting.setdefault(rel_model, []).append((model, lookup))
+            elif rel_model in visiting:
+                cycles.append((rel_model, model, lookup))
+            else:
+                incoming.setdefault(rel_model, []).append((model, lookup))
+                if rel_model not in visited:
+                    visit(rel_model)
+        visiting.remove(model)
+        visited.add(model)
+        order.append(model)
+    visit(root)
+    order.reverse()
+
+    counts = SortedDict()
+    querysets = {root: queryset}
+    for model in order:
+        if model is not root:
+            # the models with no row cascade to nothing
+            lookups = [lookup(querysets[parent]) for parent, lookup in incoming[model] if parent in counts]
+            if not lookups:
+                continue
+            querysets[model] = model._base_manager.using(using).filter(reduce(operator.or_, lookups))
+        count = querysets[model].count()
+        if count:
+            counts[model] = count
+    for model, parent, lookup in cycles:
+        if parent in counts:
+            querysets[model] = model._base_manager.using(using).filter(
+                models.Q(pk__in=querysets[model].values('pk').order_by()) | lookup(querysets[parent]))
+            counts[model] = querysets[model].count()
+
+    if deleted_querysets is not None:
+        deleted_querysets.update([(model, querysets[model]) for model in counts])
+
+    protected = SortedDict()
+    for rel_model, lookups in protecting.items():
+        lookups = [lookup(querysets[model]) for model, lookup in lookups if model in counts]
+        count = lookups and rel_model._base_manager.using(using).filter(reduce(operator.or_, lookups)).count()
+        if count:
+            protected[rel_model] = count
+    return counts, protected
+
+
+def format_deleted_count(model, count):
+    opts = model._meta
+    return mark_safe(u'<span class="label label-info">%s:</span> %d' %
+                     (escape(capfirst(opts.verbose_name_plural)), count))
+
+
+def get_deleted_summary(queryset, opts, user, admin_site, using):
+    """
+    Same as ``get_deleted_objects`` but for large querysets: the objects are
+    summarised as per-model counts, from ``count_deleted_objects``, so no
+    object is loaded into memory.
 
+    Returns a list of strings suitable for display in the template with the
+    ``unordered_list`` filter.
+    """
+    counts, protected = count_deleted_objects(queryset, using)
+    perms_needed = deleted_perms_needed(counts.keys(), user, admin_site)
+    to_delete = [format_deleted_count(model, count) for model, count in counts.items()]
+    protected = [format_deleted_count(model, count) for model, count in protected.items()]
     return to_delete, perms_needed, protected
 
 
@@ -319,6 +488,32 @@ def help_text_for_field(name, model):
 def admin_urlname(value, arg):
     return 'admin:%s_%s_%s' % (value.app_label, value.module_name, arg)
 
+# Reversed admin urls, by url name, arguments, URLconf and script prefix
+_reverse_cache = {}
+REVERSE_CACHE_SIZE = 10000
+
+def cached_reverse(viewname, args=None, kwargs=None, current_app=None):
+    """
+    ``reverse`` memoized for the admin url names. The memo is emptied when it
+    holds more than ``REVERSE_CACHE_SIZE`` urls, and when the admin urls are
+    built again.
+    """
+    key = (get_urlconf(), get_script_prefix(), viewname, current_app,
+        tuple(args or ()), tuple(sorted((kwargs or {}).items())))
+    try:
+        url = _reverse_cache.get(key)
+    except TypeError:
+        # Unhashable arguments
+        return reverse(viewname, args=args, kwargs=kwargs, current_app=current_app)
+    if url is None:
+        if len(_reverse_cache) >= REVERSE_CACHE_SIZE:
+            _reverse_cache.clear()
+        url = _reverse_cache[key] = reverse(viewname, args=args, kwargs=kwargs, current_app=current_app)
+    return url
+
+def clear_reverse_cache():
+    _reverse_cache.clear()
+
 def boolean_icon(field_val):
     icon_url = static('exadmin/img/icon-%s.png' %
                       {True: 'yes', False: 'no', None: 'unknown'}[field_val])
@@ -23,7 +23,7 @@ from django.utils.text import capfirst
 from django.utils.translation import ugettext as _
 from django.views.decorators.csrf import csrf_protect
 from django.views.generic import View
-from exadmin.util import static
+from exadmin.util import static, cached_reverse, freeze
 
 
 csrf_protect_m = method_decorator(csrf_protect)
@@ -120,10 +120,10 @@ class BaseAdminObject(object):
         return self.get_view(view_class, self.admin_site._registry.get(model), *args, **kwargs)
 
     def admin_urlname(self, name, *args, **kwargs):
-        return reverse('%s:%s' % (self.admin_site.app_name, name), args=args, kwargs=kwargs)
+        return cached_reverse('%s:%s' % (self.admin_site.app_name, name), args=args, kwargs=kwargs)
 
     def get_model_url(self, model, name, *args, **kwargs):
-        return reverse('%s:%s_%s_%s' % (self.admin_site.app_name, model._meta.app_label, model._meta.module_name, name), \
+        return cached_reverse('%s:%s_%s_%s' % (self.admin_site.app_name, model._meta.app_label, model._meta.module_name, name), \
             args=args, kwargs=kwargs, current_app=self.admin_site.name)
 
     def get_model_perm(self, model, name):
@@ -182,6 +182,22 @@ class BaseAdminObject(object):
 
 class BaseAdminPlugin(BaseAdminObject):
 
+    # Options that must be set for the plugin to be used at all
+    required_options = ()
+
+    @classmethod
+    def is_active(cls):
+        """
+        Tells from the admin options merged in the plugin class whether the
+        plugin is used. The site leaves the plugins returning ``False`` out of
+        the admin view class, so they are never instantiated; the checks that
+        need the request stay in ``init_request``.
+        """
+        for name in cls.required_options:
+            if not getattr(cls, name, None):
+                return False
+        return True
+
     def __init__(self, admin_view):
         self.admin_view = admin_view
         self.admin_site = admin_view.admin_site
@@ -246,7 +262,8 @@ class BaseAdminView(BaseAdminObject, View):
         self.plugins = plugins
 
     def get_context(self):
-        return {'admin_view': self, 'media': self.media}
+        return {'admin_view': self, 'media': self.media,
+            'jsi18n_url': self.admin_site.get_i18n_javascript_url()}
 
     @property
     def media(self):
@@ -342,6 +359,11 @@ class CommAdminView(BaseAdminView):
             getattr(messages, level)(self.request, message)
 
 
+# Form classes built by the admin views, see ModelAdminView.get_form_class.
+# The least recently used classes are dropped past FORM_CLASS_CACHE_SIZE.
+_form_class_cache = SortedDict()
+FORM_CLASS_CACHE_SIZE = 200
+
 class ModelAdminView(CommAdminView):
 
     fields = None
@@ -349,6 +371,12 @@ class ModelAdminView(CommAdminView):
     ordering = None
     model = None
 
+    # Set to True to build the form classes once per view class and form
+    # options, and reuse them in the next requests. Only for forms that don't
+    # depend on the request or the user, past what get_form_cache_key holds:
+    # a per user queryset of a foreign key would be shared by all the users.
+    form_class_cache = False
+
     def __init__(self, request, *args, **kwargs):
         self.opts = self.model._meta
         self.app_label = self.model._meta.app_label
@@ -371,8 +399,47 @@ class ModelAdminView(CommAdminView):
         except (model.DoesNotExist, ValidationError):
             return None
 
+    @filter_hook
+    def get_form_cache_key(self):
+        """
+        Returns the part of the form class cache key that doesn't come from
+        the factory arguments. Plugins building request dependent widgets
+        extend it.
+        """
+        return (freeze(getattr(self, 'style_fields', {})),)
+
+    def get_form_class(self, factory, *args, **kwargs):
+        """
+        Returns ``factory(*args, **kwargs)``, ``factory`` is a form factory like
+        ``modelform_factory`` or ``inlineformset_factory``. With
+        ``form_class_cache`` set, the built class is cached, keyed by the view
+        class, the factory arguments and ``get_form_cache_key``.
+        """
+        if not self.form_class_cache:
+            return factory(*args, **kwargs)
+
+        options = dict(kwargs)
+        callback = options.get('formfield_callback')
+        if callback is not None and getattr(callback, 'im_self', None) is self:
+            # The view's own method, already identified by the view class.
+            options['formfield_callback'] = callback.__name__
+        key = (self.__class__, factory, freeze(args), freeze(options), self.get_form_cache_key())
+
+        try:
+            form_class = _form_class_cache.pop(key, None)
+        except TypeError:
+            # Unhashable options, don't cache.
+            return factory(*args, **kwargs)
+        if form_class is None:
+            form_class = factory(*args, **kwargs)
+            while len(_form_class_cache) >= FORM_CLASS_CACHE_SIZE:
+                _form_class_cache.pop(_form_class_cache.keys()[0], None)
+        # Last in the dict, as the most recently used.
+        _form_class_cache[key] = form_class
+        return form_class
+
     def model_admin_urlname(self, name, *args, **kwargs):
-        return reverse("%s:%s_%s_%s" % (self.admin_site.app_name, self.opts.app_label, \
+        return cached_reverse("%s:%s_%s_%s" % (self.admin_site.app_name, self.opts.app_label, \
             self.module_name, name), args=args, kwargs=kwargs)
 
     def get_model_perms(self):
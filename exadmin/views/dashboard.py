@@ -13,7 +13,6 @@ from django.test.client import RequestFactory
 from django.utils.encoding import force_unicode, smart_unicode
 from django.utils.safestring import mark_safe
 from django.utils.translation import ugettext as _
-from django.views.decorators.cache import never_cache
 from exadmin import widgets as exwidgets
 from exadmin.layout import FormHelper
 from exadmin.models import UserSettings, UserWidget
@@ -501,7 +500,7 @@ class Dashboard(CommAdminView):
         context.update(new_context)
         return context
 
-    @never_cache
+    @filter_hook
     def get(self, request):
         self.widgets = self.get_widgets()
         context = self.get_context()
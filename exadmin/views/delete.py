@@ -1,6 +1,6 @@
 from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
-from django.db import transaction, router
+from django.db import router
 from django.http import Http404, HttpResponseRedirect
 from django.template.response import TemplateResponse
 from django.utils.decorators import method_decorator
@@ -8,16 +8,34 @@ from django.utils.encoding import force_unicode
 from django.utils.html import escape
 from django.utils.translation import ugettext as _
 from django.views.decorators.csrf import csrf_protect
-from exadmin.util import unquote, get_deleted_objects
+from exadmin.deletion import ChunkedDeleter, get_delete_job_id, get_delete_progress
+from exadmin.util import unquote, NestedObjects, count_deleted_objects, deleted_object_formatter, \
+    deleted_perms_needed, format_deleted_count, get_deleted_models
 
-from base import ModelAdminView, filter_hook
+from base import BaseAdminView, ModelAdminView, filter_hook
 
 
 csrf_protect_m = method_decorator(csrf_protect)
 
+# Delete confirmation page settings
+SHOW_ALL_VAR = 'all'
+PAGE_VAR = 'p'
+
 class DeleteAdminView(ModelAdminView):
     delete_confirmation_template = None
 
+    # When more objects than this would be deleted, the confirmation page shows
+    # per-model counts with a few of their objects, and the objects are only
+    # listed on demand.
+    deleted_objects_summary = 100
+    deleted_objects_sample = 3
+    # Page size of the full list of deleted objects, when show all is requested.
+    deleted_objects_per_page = 200
+    # When more objects than this would be deleted, they are deleted in batches
+    # of this size, each batch in its own transaction, and the delete page
+    # shows the progress.
+    delete_batch_size = 500
+
     def init_request(self, object_id, *args, **kwargs):
         "The 'delete' admin view for this model."
         self.obj = self.get_object(unquote(object_id))
@@ -29,11 +47,86 @@ class DeleteAdminView(ModelAdminView):
             raise Http404(_('%(name)s object with primary key %(key)r does not exist.') % {'name': force_unicode(self.opts.verbose_name), 'key': escape(object_id)})
 
         using = router.db_for_write(self.model)
+        self.delete_queryset = self.model._base_manager.using(using).filter(pk=self.obj.pk)
+        self.delete_job_id = get_delete_job_id(self.delete_queryset)
+        self.using = using
+
+        if self.request_method == 'get':
+            # Counted, the related objects are only collected to be listed
+            self.deleted_querysets = {}
+            self.deleted_counts, self.protected_counts = count_deleted_objects(
+                self.delete_queryset, using, self.deleted_querysets)
+            self.deleted_count = sum(self.deleted_counts.values())
+            self.perms_needed = deleted_perms_needed(self.deleted_counts.keys(), self.user, self.admin_site)
+        else:
+            # Nothing is counted for the delete itself, unless the user can't
+            # delete some of the models it may reach
+            self.perms_needed = deleted_perms_needed(get_deleted_models(self.model, using), self.user, self.admin_site)
+            if self.perms_needed:
+                counts = count_deleted_objects(self.delete_queryset, using)[0]
+                self.perms_needed = deleted_perms_needed(counts.keys(), self.user, self.admin_site)
+
+    @property
+    def format_deleted_object(self):
+        if not hasattr(self, '_format_deleted_object'):
+            self._format_deleted_object = deleted_object_formatter(self.admin_site)
+        return self._format_deleted_object
 
-        # Populate deleted_objects, a data structure of all related objects that
-        # will also be deleted.
-        (self.deleted_objects, self.perms_needed, self.protected) = get_deleted_objects(
-            [self.obj], self.opts, self.request.user, self.admin_site, using)
+    @filter_hook
+    def get_deleted_objects(self):
+        """
+        Returns the nested list of objects displayed on the confirmation page:
+        the whole tree for small deletes, the per-model counts with a few of
+        the objects for large ones, and one page of the objects, model by
+        model, when show all is requested. Sets the protected objects
+        displayed along.
+        """
+        self.show_all = SHOW_ALL_VAR in self.request.GET
+        self.summary = self.deleted_count > self.deleted_objects_summary and not self.show_all
+        self.page_num = 0
+        # The objects listed by show all, the many to many rows are only counted
+        self.listed_counts = [(model, count) for model, count in self.deleted_counts.items()
+            if not model._meta.auto_created]
+
+        if self.summary or self.show_all:
+            self.protected = [format_deleted_count(model, count) for model, count in self.protected_counts.items()]
+        if self.summary:
+            deleted_objects = []
+            for model, count in self.deleted_counts.items():
+                deleted_objects.append(format_deleted_count(model, count))
+                if not model._meta.auto_created:
+                    deleted_objects.append([self.format_deleted_object(obj) for obj in
+                        self.deleted_querysets[model].order_by('pk')[:self.deleted_objects_sample]])
+            return deleted_objects
+        if self.show_all:
+            try:
+                self.page_num = max(int(self.request.GET.get(PAGE_VAR, 0)), 0)
+            except ValueError:
+                pass
+            return self.get_deleted_page(self.page_num * self.deleted_objects_per_page)
+
+        collector = NestedObjects(using=self.using)
+        collector.collect([self.obj])
+        self.protected = [self.format_deleted_object(obj) for obj in collector.protected]
+        return collector.nested(self.format_deleted_object)
+
+    def get_deleted_page(self, offset):
+        """
+        Returns the deleted objects of a page of show all, only the objects of
+        the page are loaded.
+        """
+        limit = self.deleted_objects_per_page
+        deleted_objects = []
+        for model, count in self.listed_counts:
+            if offset >= count:
+                offset -= count
+                continue
+            objs = self.deleted_querysets[model].order_by('pk')[offset:offset + limit]
+            deleted_objects.extend([self.format_deleted_object(obj) for obj in objs])
+            limit, offset = limit - min(count - offset, limit), 0
+            if limit <= 0:
+                break
+        return deleted_objects
 
     @csrf_protect_m
     @filter_hook
@@ -47,8 +140,8 @@ class DeleteAdminView(ModelAdminView):
             "admin/delete_confirmation.html"
         ], context, current_app=self.admin_site.name)
 
+    # No transaction around the post, the deleter commits each of its batches
     @csrf_protect_m
-    @transaction.commit_on_success
     @filter_hook
     def post(self, request, object_id):
         if self.perms_needed:
@@ -62,28 +155,49 @@ class DeleteAdminView(ModelAdminView):
         else:
             return response
 
+    @filter_hook
+    def get_deleter(self):
+        """
+        Returns the ``ChunkedDeleter`` of the object. A small delete is done by
+        its first batch, in one transaction.
+        """
+        return ChunkedDeleter(self.delete_queryset, self.using, self.delete_batch_size, self.delete_job_id)
+
     @filter_hook
     def delete_model(self):
         """
         Given a model instance delete it from the database.
         """
-        self.obj.delete()
+        self.get_deleter().delete()
 
     @filter_hook
     def get_context(self):        
         object_name = force_unicode(self.opts.verbose_name)
         app_label = self.opts.app_label
 
+        deleted_objects = self.get_deleted_objects()
         if self.perms_needed or self.protected:
             title = _("Cannot delete %(name)s") % {"name": object_name}
         else:
             title = _("Are you sure?")
 
+        per_page = self.deleted_objects_per_page
+        listed_count = sum([count for model, count in self.listed_counts])
+
         new_context = {
             "title": title,
             "object_name": object_name,
             "object": self.obj,
-            "deleted_objects": self.deleted_objects,
+            "deleted_objects": deleted_objects,
+            "deleted_count": listed_count,
+            "deleted_summary": self.summary,
+            "delete_progress_url": self.deleted_count > self.delete_batch_size and \
+                self.admin_urlname('delete_progress', self.delete_job_id),
+            "show_all_url": self.summary and self.get_query_string({SHOW_ALL_VAR: ''}),
+            "prev_page_url": self.show_all and self.page_num > 0 and \
+                self.get_query_string({PAGE_VAR: self.page_num - 1}),
+            "next_page_url": self.show_all and (self.page_num + 1) * per_page < listed_count and \
+                self.get_query_string({PAGE_VAR: self.page_num + 1}),
             "perms_lacking": self.perms_needed,
             "protected": self.protected,
             "opts": self.opts,
@@ -103,4 +217,24 @@ class DeleteAdminView(ModelAdminView):
             return self.admin_urlname('index')
         return self.model_admin_urlname('changelist')
 
-
+    @filter_hook
+    def get_media(self):
+        media = super(DeleteAdminView, self).get_media()
+        if self.deleted_count > self.delete_batch_size:
+            media.add_js([self.static('exadmin/js/delete.js')])
+        return media
+
+
+class DeleteProgressView(BaseAdminView):
+    """
+    Returns the progress of a batched delete as json, polled by the delete
+    confirmation page while the delete request runs.
+    """
+
+    def get(self, request, job_id):
+        progress = get_delete_progress(job_id)
+        if progress is None:
+            return self.render_response({})
+        if not self.user.has_perm(progress.get('perm')):
+            raise PermissionDenied
+        return self.render_response(progress)
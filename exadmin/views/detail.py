@@ -1,19 +1,18 @@
-import copy
-
 from django import forms
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import PermissionDenied, ObjectDoesNotExist
+from django.core.exceptions import PermissionDenied, ObjectDoesNotExist, ValidationError
 from django.db import models
 from django.forms.models import modelform_factory
 from django.http import Http404
 from django.template import loader
 from django.template.response import TemplateResponse
+from django.utils.datastructures import SortedDict
 from django.utils.encoding import force_unicode, smart_unicode
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
 from django.utils.translation import ugettext as _
 from django.utils.html import conditional_escape
-from exadmin.layout import FormHelper, Layout, Fieldset, Container, Column, Field
+from exadmin.layout import FormHelper, Layout, Fieldset, Container, Column, Field, copy_layout
 from exadmin.util import unquote, lookup_field, display_for_field, boolean_icon, label_for_field
 
 from base import ModelAdminView, filter_hook, csrf_protect_m
@@ -115,7 +114,7 @@ class DetailAdminView(ModelAdminView):
 
     @filter_hook
     def get_form_layout(self):
-        layout = copy.deepcopy(self.detail_layout or self.form_layout)
+        layout = copy_layout(self.detail_layout or self.form_layout)
 
         if layout is None:
             layout = Layout(Container(
@@ -164,7 +163,7 @@ class DetailAdminView(ModelAdminView):
             "exclude": exclude,
         }
         defaults.update(kwargs)
-        return modelform_factory(self.model, **defaults)
+        return self.get_form_class(modelform_factory, self.model, **defaults)
 
     @filter_hook
     def get_form_helper(self):
@@ -247,4 +246,76 @@ class DetailAdminUtil(DetailAdminView):
         self.org_obj = obj
 
 
+class BulkDetailAdminView(ModelAdminView):
+    """
+    The detail of many objects in one request, as JSON. The pks are given
+    with ``pk`` in the query string, repeated, and the response maps each pk
+    to the label/value map ``AjaxDetailPlugin`` returns for one object.
+
+    The fields are the ones of the detail layout. The objects are read with a
+    single queryset, with ``select_related`` for the foreign keys and
+    ``prefetch_related`` for the many to many fields of the layout.
+    """
+
+    # Most objects taken in one request
+    max_detail_objects = 100
+
+    def init_request(self, *args, **kwargs):
+        if not self.has_change_permission():
+            raise PermissionDenied
+
+        self.pks = []
+        for pk in self.request.GET.getlist('pk')[:self.max_detail_objects]:
+            try:
+                self.pks.append(self.opts.pk.to_python(pk))
+            except ValidationError:
+                pass
+
+    def get_detail_view(self):
+        """
+        The detail view the layout and values are taken from, once for all
+        the objects.
+        """
+        detail = self.get_model_view(DetailAdminUtil, self.model, None)
+        detail.form_obj = detail.get_model_form()()
+        return detail
+
+    @filter_hook
+    def get_detail_queryset(self, field_names):
+        queryset = self.queryset().filter(pk__in=self.pks)
+        related, many = [], []
+        for name in field_names:
+            try:
+                field = self.opts.get_field(name)
+            except models.FieldDoesNotExist:
+                continue
+            if isinstance(field, models.ForeignKey):
+                related.append(name)
+            elif isinstance(field, models.ManyToManyField):
+                many.append(name)
+        if related:
+            queryset = queryset.select_related(*related)
+        if many:
+            queryset = queryset.prefetch_related(*many)
+        return queryset
+
+    @csrf_protect_m
+    @filter_hook
+    def get(self, request, *args, **kwargs):
+        detail = self.get_detail_view()
+        field_names = [f for p, f in detail.get_form_layout().get_field_names()]
+
+        objs = dict([(obj.pk, obj) for obj in self.get_detail_queryset(field_names)])
+        results = SortedDict()
+        for pk in self.pks:
+            obj = objs.get(pk)
+            if obj is None or not self.has_change_permission(obj):
+                continue
+            detail.obj = detail.org_obj = obj
+            result = [detail.get_field_result(f) for f in field_names]
+            results[smart_unicode(pk)] = SortedDict([(r.label, r.val) for r in result])
+
+        return self.render_response(results)
+
+
 
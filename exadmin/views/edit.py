@@ -1,5 +1,3 @@
-import copy
-
 from django import forms
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import PermissionDenied
@@ -13,7 +11,7 @@ from django.utils.html import escape
 from django.template import loader
 from django.utils.translation import ugettext as _
 from exadmin import widgets
-from exadmin.layout import FormHelper, Layout, Fieldset, Container, Column, Field
+from exadmin.layout import FormHelper, Layout, Fieldset, Container, Column, Field, copy_layout
 from exadmin.util import unquote
 from exadmin.views.detail import DetailAdminUtil
 
@@ -161,11 +159,11 @@ class ModelFormAdminView(ModelAdminView):
             "formfield_callback": self.formfield_for_dbfield,
         }
         defaults.update(kwargs)
-        return modelform_factory(self.model, **defaults)
+        return self.get_form_class(modelform_factory, self.model, **defaults)
 
     @filter_hook
     def get_form_layout(self):
-        layout = copy.deepcopy(self.form_layout)
+        layout = copy_layout(self.form_layout)
         fields = self.form_obj.fields.keys() + list(self.get_readonly_fields())
 
         if layout is None:
@@ -186,19 +186,22 @@ class ListAdminView(ModelAdminView):
         self.can_show_all = self.result_count <= self.list_max_show_all
         self.multi_page = self.result_count > self.list_per_page
 
-        # Get the list of objects to display on this page.
+        # Get the list of objects to display on this page. The queryset is
+        # left unevaluated, so plugins can still change how it is fetched.
         if (self.show_all and self.can_show_all) or not self.multi_page:
             self.result_list = self.list_queryset._clone()
+            self.has_more = False
         else:
             try:
-                self.result_list = self.paginator.page(self.page_num+1).object_list
+                page = self.paginator.page(self.page_num+1)
             except InvalidPage:
                 if ERROR_FLAG in self.request.GET.keys():
                     return SimpleTemplateResponse('admin/invalid_setup.html', {
                         'title': _('Database error'),
                     })
                 return HttpResponseRedirect(self.request.path + '?' + ERROR_FLAG + '=1')
-        self.has_more = self.result_count > (self.list_per_page * self.page_num + len(self.result_list))
+            self.result_list = page.object_list
+            self.has_more = page.has_next()
 
     @filter_hook
     def get_result_list(self):